@@ -0,0 +1,310 @@
+import json
+import re
+import time
+import inspect
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from Models_r1 import ChatClient
+from Session_r1 import MessageRecord, SessionStore
+from Usage_r1 import BudgetExceeded, UsageMeter, best_effort_answer
+
+########################################################################################################################
+# Speculative tool prefetch
+#
+# Each rule maps a regex over the user query to a tool call. The matching calls are started in a thread pool while the
+# LLM is still generating; if the model then asks for the same call (same tool, same arguments after defaults are
+# applied) the prefetched result is reused, otherwise the prefetch is cancelled and discarded.
+
+SPECULATION_RULES: List[Tuple[str, "re.Pattern", Callable[["re.Match"], Dict[str, Any]]]] = [
+    (
+        "get_weather",
+        re.compile(r"\b(?i:weather|temperature|rain|humidity|forecast)\b.*?\b(?i:in|at|for|of)\s+(?:the\s+)?([A-Z][\w'.-]*(?:[ ,]+[A-Z][\w'.-]*)*)"),
+        lambda m: {"location": m.group(1).strip(" ,.")},
+    ),
+    (
+        "get_news",
+        re.compile(r"\bnews\b.*?\b(?:about|on|in|from|for)\s+([\w'.-]+(?:[ ,]+[\w'.-]+)*)", re.IGNORECASE),
+        lambda m: {"topic": m.group(1).strip(" ,.?")},
+    ),
+    (
+        "currency_converter",
+        re.compile(r"(\d+(?:\.\d+)?)\s*([A-Z]{3})\s+(?:to|in|into)\s+([A-Z]{3})\b"),
+        lambda m: {"amount": float(m.group(1)), "source_curr": m.group(2), "target_curr": m.group(3)},
+    ),
+]
+
+# Tools a follow-up ("and Lagos?") may repeat, with the parameter that takes the new text
+FOLLOW_UP_PARAMS = {"get_weather": "location", "get_news": "topic"}
+FOLLOW_UP_RE = re.compile(r"^\s*(?:and|what about|how about)\s+(?:in\s+|for\s+|about\s+)?(.+?)\s*\??\s*$", re.IGNORECASE)
+
+
+class ToolSpeculator:
+    def __init__(
+        self,
+        available_functions: Dict[str, Callable],
+        rules: Optional[list] = None,
+        follow_up_params: Optional[Dict[str, str]] = None,
+        max_predictions: int = 3,
+        max_workers: int = 4,
+    ):
+        """
+        Predicting likely tool calls from the user query and prefetching them in the background.
+        """
+        self.available_functions = available_functions
+        self.rules = rules if rules is not None else SPECULATION_RULES
+        self.follow_up_params = follow_up_params if follow_up_params is not None else FOLLOW_UP_PARAMS
+        self.max_predictions = max_predictions
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculate")
+        self.last_prediction: Optional[Tuple[str, Dict[str, Any]]] = None  # used for follow-up questions
+        self.stats = {"predicted": 0, "hits": 0, "misses": 0, "cancelled": 0, "orphaned": 0, "saved_seconds": 0.0}
+        self.running_orphans = 0  # unused prefetches that were already running and still hold a worker
+        self._orphan_lock = threading.Lock()
+
+    def call_key(self, tool_name: str, args: Dict[str, Any]) -> Optional[str]:
+        """
+        Building a comparable key for a tool call, with defaults applied and strings normalized.
+        """
+        func = self.available_functions.get(tool_name)
+        if func is None:
+            return None
+        try:
+            bound = inspect.signature(func).bind(**args)
+        except TypeError:
+            return None
+        bound.apply_defaults()
+        normalized = {
+            k: v.strip().lower() if isinstance(v, str) else v
+            for k, v in bound.arguments.items()
+        }
+        return tool_name + ":" + json.dumps(normalized, sort_keys=True, default=str)
+
+    def predict(self, user_query: str, history: Optional[List[Any]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Predicting tool calls for a query with the lightweight rules, falling back to the last call for follow-ups.
+        """
+        predictions = []
+        for tool_name, pattern, build_args in self.rules:
+            if tool_name not in self.available_functions:
+                continue
+            for match in pattern.finditer(user_query):
+                predictions.append((tool_name, build_args(match)))
+
+        # "and Lagos?" after a weather question repeats the previous tool with the new location / topic
+        follow_up = FOLLOW_UP_RE.match(user_query)
+        if not predictions and follow_up and self.last_prediction and history and len(history) > 1:
+            tool_name, args = self.last_prediction
+            param = self.follow_up_params.get(tool_name)
+            if param is not None:
+                predictions.append((tool_name, {**args, param: follow_up.group(1)}))
+
+        if predictions:
+            self.last_prediction = predictions[0]
+        return predictions[: self.max_predictions]
+
+    def prefetch(self, user_query: str, history: Optional[List[Any]] = None) -> Dict[str, Tuple[Future, float]]:
+        """
+        Starting the predicted tool calls concurrently, keyed by their call key.
+        """
+        started = {}
+        for tool_name, args in self.predict(user_query, history):
+            key = self.call_key(tool_name, args)
+            if key is None or key in started:
+                continue
+            started[key] = (self.executor.submit(self._timed_call, tool_name, args), time.perf_counter())
+        self.stats["predicted"] += len(started)
+        return started
+
+    def _timed_call(self, tool_name: str, args: Dict[str, Any]) -> Tuple[Any, float]:
+        result = self.available_functions[tool_name](**args)
+        return result, time.perf_counter()
+
+    def claim(self, prefetched: Dict[str, Tuple[Future, float]], tool_name: str, args: Dict[str, Any], llm_done: float):
+        """
+        Returning (True, result) when the call was prefetched, (False, None) otherwise.
+        """
+        key = self.call_key(tool_name, args)
+        entry = prefetched.pop(key, None) if key else None
+        if entry is None:
+            self.stats["misses"] += 1
+            return False, None
+        future, started = entry
+        try:
+            result, finished = future.result()
+        except Exception:
+            # a failed prefetch is treated as a miss so the tool is called again normally
+            self.stats["misses"] += 1
+            return False, None
+        self.stats["hits"] += 1
+        self.stats["saved_seconds"] += max(0.0, min(finished, llm_done) - started)
+        return True, result
+
+    def discard(self, prefetched: Dict[str, Tuple[Future, float]]):
+        """
+        Cancelling prefetches the model did not ask for; calls already running cannot be stopped and are left to finish.
+        """
+        for future, _ in prefetched.values():
+            if future.cancel():
+                self.stats["cancelled"] += 1
+            elif not future.done():
+                self.stats["orphaned"] += 1
+                with self._orphan_lock:
+                    self.running_orphans += 1
+                future.add_done_callback(self._orphan_done)
+        prefetched.clear()
+
+    def _orphan_done(self, future: Future):
+        with self._orphan_lock:
+            self.running_orphans -= 1
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returning the hit rate and latency saved so far.
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "running_orphans": self.running_orphans,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "precision": self.stats["hits"] / self.stats["predicted"] if self.stats["predicted"] else 0.0,
+        }
+
+########################################################################################################################
+
+class Agent:
+    def __init__(
+        self,
+        system_prompt: str,
+        llm_client: ChatClient,
+        available_functions: dict,
+        speculate: bool = False,
+        session_store: Optional[SessionStore] = None,
+        session_id: Optional[str] = None,
+        usage_meter: Optional[UsageMeter] = None,
+    ):
+        self.client = llm_client
+        self.available_functions = available_functions  # Available functions for tool calls
+        self.speculator = ToolSpeculator(available_functions) if speculate else None
+        self.session_store = session_store  # persists / resumes messages_state when given
+        self.session_id = session_id or uuid.uuid4().hex
+        self.usage_meter = usage_meter or UsageMeter()  # token / time accounting, budgets end a run early
+        self._messages: List[MessageRecord] = []
+        if not self.messages_state:
+            self._append({"role": "system", "content": system_prompt})  # Initialize with system prompt
+
+    @property
+    def messages_state(self) -> List[MessageRecord]:
+        if self.session_store is not None:
+            return self.session_store.get(self.session_id)
+        return self._messages
+
+    def _append(self, message: Any):
+        if self.session_store is not None:
+            self.session_store.append(self.session_id, message)
+        else:
+            self._messages.append(MessageRecord.from_wire(message))
+
+    def wire_messages(self) -> List[Dict[str, Any]]:
+        """
+        Returning the message state in the OpenAI wire format.
+        """
+        return [record.to_wire() for record in self.messages_state]
+
+    def run(self, user_query: str, on_delta: Optional[Callable[[str], None]] = None):
+        """
+        Answering a query; with on_delta the final answer is streamed to it as it is generated.
+        If a usage budget runs out, the run stops and a best-effort answer is returned instead.
+        """
+        meter = self.usage_meter
+        meter.start_query()
+        try:
+            return self._run(user_query, on_delta, meter)
+        except BudgetExceeded as e:
+            return self._stop_early(e, on_delta)
+        finally:
+            meter.end_query()
+
+    def _stop_early(self, error: BudgetExceeded, on_delta: Optional[Callable[[str], None]]) -> str:
+        """
+        Answering with the tool results of the current query gathered before the budget ran out.
+        """
+        observations = []
+        for record in reversed(self.messages_state):
+            if record.role == "user":
+                break
+            if record.role == "tool":
+                observations.append(record.text)
+        answer = best_effort_answer(error, observations[::-1])
+        self._append({"role": "assistant", "content": answer})
+        if on_delta is not None:
+            on_delta(answer)
+        return answer
+
+    def _run(self, user_query: str, on_delta: Optional[Callable[[str], None]], meter: UsageMeter) -> str:
+        # Appending the user query to the message state
+        self._append({"role": "user", "content": user_query})
+        meter.check()
+
+        # Starting likely tool calls while the LLM is generating (opt-in)
+        prefetched = self.speculator.prefetch(user_query, self.messages_state) if self.speculator else {}
+
+        # Making the initial request
+        response_message = self.client.run(self.wire_messages(), route="tool_selection", meter=meter)
+        llm_done = time.perf_counter()
+        print(response_message)
+        tool_calls = response_message.tool_calls
+
+        # Appending the response message to the message state
+        self._append(response_message)
+
+        if tool_calls:
+            # Processing tool calls
+            for tool_call in tool_calls:
+                function_name = tool_call.function.name
+                try:
+                    function_to_call = self.available_functions[function_name]  # Ensure available_functions is defined
+                    function_args = json.loads(tool_call.function.arguments)
+
+                    # Reusing the prefetched result if the model asked for the predicted call
+                    hit, function_response = (
+                        self.speculator.claim(prefetched, function_name, function_args, llm_done)
+                        if self.speculator else (False, None)
+                    )
+                    if not hit:
+                        # Calling the function with arguments
+                        function_response = function_to_call(**function_args)
+                except Exception as e:
+                    # every tool call needs a tool reply, or the (persisted) message sequence becomes invalid
+                    function_response = f"Failed to execute tool '{function_name}'. Error: {e}"
+
+                # Updating the message state with the tool call results
+                self._append(
+                    {
+                        "role": "tool",
+                        "content": str(function_response),
+                        "tool_call_id": tool_call.id,
+                    }
+                )
+        else:
+            print("No tool calls found.")
+
+        if self.speculator:
+            self.speculator.discard(prefetched)
+
+        # Making the final request with tool call results
+        meter.check()
+        if on_delta is not None:
+            deltas = []
+            for delta in self.client.run_stream(self.wire_messages(), route="planning", meter=meter):
+                deltas.append(delta)
+                on_delta(delta)
+            self._append({"role": "assistant", "content": "".join(deltas)})
+            return "".join(deltas)
+
+        final_response = self.client.run(self.wire_messages(), route="planning", meter=meter)
+        # Keeping only the text: tool calls in the final reply are never run, and unanswered tool calls in the
+        # (persisted) state would make every later request of the session invalid
+        self._append({"role": "assistant", "content": final_response.content or ""})
+        return final_response.content
@@ -0,0 +1,255 @@
+import atexit
+import os
+import queue
+import re
+import sys
+import threading
+import weakref
+from typing import Callable, Dict, List, Optional, TextIO
+
+from colorama import Fore, Style
+
+########################################################################################################################
+# Buffered console rendering for cprint
+#
+# A line starting with "<Label>:" takes the label's color; lines without a label keep the color of the last labelled
+# line of the same message (or stream). Rendered text goes through a queue to one background writer thread, which
+# joins whatever is pending into a single write + flush, so agent threads only wait on the terminal when it falls
+# max_pending chunks behind (or, with lossy=True, drop chunks and leave a marker instead).
+# Colors are switched off when the output is not a terminal (NO_COLOR / FORCE_COLOR override; Jupyter counts as color).
+
+LABEL_COLORS = {
+    "Agent": Fore.BLUE+Style.BRIGHT,
+    "Thought": Fore.CYAN,
+    "Action": Fore.YELLOW,
+    "Pause": Fore.MAGENTA,
+    "Observation": Fore.GREEN,
+    "Answer": Fore.BLUE,
+}
+RESET = Style.RESET_ALL
+LABEL_RE = re.compile(r"(\w+):")
+WORD_RE = re.compile(r"\w*")
+NEWLINE_RE = re.compile(r"(\n)")
+
+
+def supports_color(stream: TextIO) -> bool:
+    """
+    Deciding whether ANSI colors should be written to the stream.
+    """
+    if os.environ.get("NO_COLOR"):
+        return False
+    if os.environ.get("FORCE_COLOR"):
+        return True
+    if type(stream).__module__.startswith("ipykernel"):  # notebooks render ANSI colors
+        return True
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def in_notebook() -> bool:
+    return type(sys.stdout).__module__.startswith("ipykernel")
+
+
+class _LineState:
+    __slots__ = ("color", "pending", "line_color")
+
+    def __init__(self):
+        self.color = RESET        # color of the last labelled line
+        self.pending = ""         # start of the current line while it may still turn out to be a label
+        self.line_color = None    # color of the current line once decided, None at the start of a line
+
+########################################################################################################################
+
+class ConsoleRenderer:
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        color: Optional[bool] = None,
+        background: bool = True,
+        max_pending: int = 10000,
+        lossy: bool = False,
+    ):
+        """
+        Rendering labelled agent output; stream defaults to the current sys.stdout, color to auto-detection.
+        With more than max_pending chunks queued, callers wait for the writer, or with lossy=True the chunk is dropped
+        and a "[N chunks dropped]" marker is written once the writer catches up.
+        """
+        self.stream = stream
+        self.color = color
+        self.background = background
+        self.max_pending = max_pending
+        self.lossy = lossy
+        self.dropped = 0  # chunks dropped because the writer could not keep up (lossy mode only)
+        self._unreported = 0  # dropped chunks not yet reported by a marker
+        self._drop_lock = threading.Lock()
+        self._color_cache: "weakref.WeakKeyDictionary[TextIO, bool]" = weakref.WeakKeyDictionary()
+        self._streams: Dict[str, _LineState] = {}
+        self._lock = threading.Lock()  # guards the per-stream line state
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max_pending)
+        self._writer: Optional[threading.Thread] = None
+
+    # output ###########################################################################################################
+
+    def _target(self):
+        stream = self.stream or sys.stdout
+        if self.color is not None:
+            return stream, self.color
+        try:
+            use_color = self._color_cache.get(stream)
+            if use_color is None:
+                use_color = self._color_cache[stream] = supports_color(stream)
+        except TypeError:  # stream cannot be weakly referenced
+            use_color = supports_color(stream)
+        return stream, use_color
+
+    def _emit(self, stream: TextIO, text: str):
+        if not text:
+            return
+        if not self.background:
+            stream.write(text)
+            stream.flush()
+            return
+        if self._writer is None:
+            self._start_writer()
+        if not self.lossy:
+            self._queue.put((stream, text))  # back-pressure rather than losing output
+            return
+        with self._drop_lock:
+            try:
+                if self._unreported:
+                    self._queue.put_nowait((stream, f"[{self._unreported} chunks dropped]\n"))
+                    self._unreported = 0
+                self._queue.put_nowait((stream, text))
+            except queue.Full:
+                self.dropped += 1
+                self._unreported += 1
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="console-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            # one write per stream per batch, keeping the order of chunks
+            start = 0
+            for i in range(1, len(batch) + 1):
+                if i == len(batch) or batch[i][0] is not batch[start][0]:
+                    stream = batch[start][0]
+                    try:
+                        stream.write("".join(text for _, text in batch[start:i]))
+                        stream.flush()
+                    except (OSError, ValueError):  # closed or broken stream
+                        pass
+                    start = i
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self):
+        """
+        Waiting until everything rendered so far has been written.
+        """
+        if self._writer is not None:
+            with self._drop_lock:
+                if self._unreported:
+                    self._queue.put((self.stream or sys.stdout, f"[{self._unreported} chunks dropped]\n"))
+                    self._unreported = 0
+            self._queue.join()
+
+    # rendering ########################################################################################################
+
+    @staticmethod
+    def _paint(text: str, color: str, use_color: bool) -> str:
+        return f"{color}{text}{RESET}" if use_color else text
+
+    def render(self, message: str):
+        """
+        Rendering a whole message line by line, like print per line.
+        """
+        stream, use_color = self._target()
+        last_color = RESET
+        out: List[str] = []
+        for line in message.splitlines():
+            label_match = LABEL_RE.match(line)
+            if label_match:
+                last_color = LABEL_COLORS.get(label_match.group(1), RESET)
+            out.append(self._paint(line, last_color, use_color))
+            out.append("\n")
+        self._emit(stream, "".join(out))
+
+    def write_delta(self, text: str, key: str = "default"):
+        """
+        Rendering a streamed piece of text; the label of a line is decided as soon as its first word is complete.
+        """
+        stream, use_color = self._target()
+        out: List[str] = []
+        with self._lock:
+            state = self._streams.setdefault(key, _LineState())
+            for piece in NEWLINE_RE.split(text):
+                if piece == "\n":
+                    if state.line_color is None:  # line ended while undecided
+                        state.line_color = state.color
+                    out.append(self._paint(state.pending, state.line_color, use_color) if state.pending else "")
+                    out.append("\n")
+                    state.pending, state.line_color = "", None
+                elif piece:
+                    if state.line_color is not None:
+                        out.append(self._paint(piece, state.line_color, use_color))
+                        continue
+                    state.pending += piece
+                    word = WORD_RE.match(state.pending).end()
+                    if word == len(state.pending):
+                        continue  # still only word characters, the label is not known yet
+                    if word and state.pending[word] == ":":
+                        state.color = LABEL_COLORS.get(state.pending[:word], RESET)
+                    state.line_color = state.color
+                    out.append(self._paint(state.pending, state.line_color, use_color))
+                    state.pending = ""
+        self._emit(stream, "".join(out))
+
+    def end_stream(self, key: str = "default"):
+        """
+        Finishing a stream: writing any undecided text and ending the line.
+        """
+        stream, use_color = self._target()
+        with self._lock:
+            state = self._streams.pop(key, None)
+        if state is None:
+            return
+        if state.pending:
+            self._emit(stream, self._paint(state.pending, state.color, use_color) + "\n")
+        elif state.line_color is not None:
+            self._emit(stream, "\n")
+
+    def on_delta(self, key: str = "default") -> Callable[[str], None]:
+        """
+        Returning a callback for streamed deltas (e.g. Agent.run(on_delta=...)) bound to one stream key.
+        """
+        return lambda text: self.write_delta(text, key)
+
+########################################################################################################################
+
+_default_renderer: Optional[ConsoleRenderer] = None
+
+
+def get_renderer() -> ConsoleRenderer:
+    """
+    Returning the shared renderer used by cprint.
+    Its output may land after a later plain print(); call flush() first where the order matters. In a notebook it
+    writes synchronously, so the output stays in order with print() in the same cell.
+    """
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = ConsoleRenderer(background=not in_notebook())
+    return _default_renderer
@@ -0,0 +1,186 @@
+import json
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer, UnicodeDammit
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+NOISE_TAGS = ["script", "style", "noscript", "form", "svg", "iframe"]
+LAYOUT_TAGS = ["nav", "header", "footer", "aside"]  # page chrome, but an <article> keeps its own <header> headline
+BLOCK_TAGS = ["h1", "h2", "h3", "p", "li", "pre", "blockquote", "td"]
+# noise containers are parsed too (with everything inside them) so they can be removed before blocks are collected
+TEXT_TAGS = SoupStrainer(["title", "article", "main"] + BLOCK_TAGS + NOISE_TAGS + LAYOUT_TAGS)
+WORD_RE = re.compile(r"\w+")
+
+########################################################################################################################
+
+def make_session(pool_size: int = 16) -> requests.Session:
+    """
+    Creating a requests session with a connection pool shared by all page fetches.
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+session = make_session()
+
+
+def fetch_page(url: str, max_bytes: int = 500_000, timeout: float = 8.0) -> str:
+    """
+    Downloading a page, reading at most max_bytes of the body.
+    """
+    with session.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "")
+        if "html" not in content_type and "text" not in content_type:
+            raise ValueError(f"Unsupported content type: {content_type}")
+        body = bytearray()
+        for block in response.iter_content(chunk_size=16_384):
+            body.extend(block)
+            if len(body) >= max_bytes:
+                del body[max_bytes:]
+                break
+        if "charset=" in content_type.lower():
+            return body.decode(response.encoding, errors="replace")
+        # without a charset header requests assumes ISO-8859-1; let bs4 sniff the BOM / <meta charset> / UTF-8 instead
+        return UnicodeDammit(bytes(body), is_html=True).unicode_markup or body.decode("utf-8", errors="replace")
+
+
+def content_root(soup: BeautifulSoup):
+    """
+    Returning the first <article> (else <main>) that is not part of the page chrome, or the whole page.
+    """
+    for name in ("article", "main"):
+        for tag in soup.find_all(name):
+            if tag.find_parent(LAYOUT_TAGS) is None:  # e.g. teaser <article>s in an <aside>
+                return tag
+    return soup
+
+
+def extract_text(html: str) -> Dict[str, Any]:
+    """
+    Extracting the title and main text blocks of a page, preferring <article> / <main> when present.
+    """
+    soup = BeautifulSoup(html, "html.parser", parse_only=TEXT_TAGS)
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+    root = content_root(soup)
+    if root is soup:  # no content root: drop the page chrome; inside a root it is part of the content
+        for tag in soup(LAYOUT_TAGS):
+            tag.decompose()
+    blocks, seen = [], set()
+    for element in root.find_all(BLOCK_TAGS):
+        text = " ".join(element.get_text(" ", strip=True).split())
+        if text in seen:
+            continue  # nested blocks (e.g. <p> inside <li>) repeat their text
+        if len(text) > 30 or element.name in ("h1", "h2", "h3"):
+            seen.add(text)
+            blocks.append(text)
+    return {"title": title, "blocks": blocks}
+
+
+def chunk_blocks(blocks: List[str], chunk_chars: int = 1200) -> List[str]:
+    """
+    Merging consecutive text blocks into chunks of at most chunk_chars characters.
+    """
+    chunks, current = [], ""
+    for block in blocks:
+        block = block[:chunk_chars]
+        if current and len(current) + len(block) + 1 > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{block}" if current else block
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def score_chunk(chunk: str, query_terms: set, page_rank: int) -> float:
+    """
+    Scoring a chunk by query-term coverage, lightly favouring pages ranked higher by the search engine.
+    """
+    words = WORD_RE.findall(chunk.lower())
+    if not words:
+        return 0.0
+    hits = sum(1 for w in words if w in query_terms)
+    coverage = len(query_terms.intersection(words)) / len(query_terms) if query_terms else 0.0
+    return coverage + hits / math.sqrt(len(words)) + 0.1 / (page_rank + 1)
+
+########################################################################################################################
+
+def stream_pages(
+    urls: List[str],
+    query: str = "",
+    max_bytes: int = 500_000,
+    timeout: float = 8.0,
+    chunk_chars: int = 1200,
+    max_workers: int = 8,
+    deadline: Optional[float] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Fetching the URLs concurrently and yielding each page's scored chunks as soon as it is ready.
+    """
+    query_terms = set(WORD_RE.findall(query.lower()))
+
+    def work(rank: int, url: str) -> Dict[str, Any]:
+        page = extract_text(fetch_page(url, max_bytes=max_bytes, timeout=timeout))
+        chunks = [
+            {"url": url, "title": page["title"], "text": text, "score": round(score_chunk(text, query_terms, rank), 4)}
+            for text in chunk_blocks(page["blocks"], chunk_chars)
+        ]
+        return {"url": url, "rank": rank, "title": page["title"], "chunks": chunks}
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+    futures = {executor.submit(work, rank, url): url for rank, url in enumerate(urls)}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {"url": futures[future], "error": str(e), "chunks": []}
+    except TimeoutError:
+        pass  # slow pages past the deadline are dropped
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def urls_from_results(search_results: Union[str, List[Any]]) -> List[str]:
+    """
+    Pulling URLs out of a search result (JSON string from ddg_search / get_news / web_search, or a list).
+    """
+    if isinstance(search_results, str):
+        try:
+            search_results = json.loads(search_results)
+        except json.JSONDecodeError:
+            return re.findall(r"https?://[^\s\"'<>]+", search_results)
+    if isinstance(search_results, dict):
+        search_results = search_results.get("results", [])
+    if not isinstance(search_results, list):  # other JSON values ("5", null, ...) hold no URLs
+        return []
+
+    urls = []
+    for item in search_results:
+        if isinstance(item, str):
+            url = item
+        elif isinstance(item, dict):
+            url = item.get("url") or item.get("href")
+        else:
+            continue
+        if isinstance(url, str) and url not in urls:
+            urls.append(url)
+    return urls
@@ -0,0 +1,473 @@
+import os
+import re
+import math
+import time
+import atexit
+import hashlib
+import shutil
+import threading
+from functools import lru_cache
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import orjson
+
+try:
+    import fcntl
+except ImportError:  # no inter-process lock on Windows
+    fcntl = None
+
+########################################################################################################################
+# Local BM25 index over retrieved search / news results
+#
+# Layout on disk (one directory):
+#   docs.jsonl          append-only document log (orjson), the source of truth; unflushed docs are replayed from it
+#   tombstones.u32      ids of documents superseded by a newer version of the same URL
+#   seg_<first>/*.npy   immutable segments (seg_<first>-<end> when merged), memory-mapped on load:
+#                         terms (sorted uint64 term hashes), offsets, doc_ids, tfs   -> postings
+#                         lens, retrieved, published, kinds, url_hashes, doc_offsets -> per-document columns
+#                         first_id                                                  -> first global doc id
+#   LOCK                flock'ed by the one process allowed to write; other processes open the index read-only
+
+KINDS = {"text": 0, "news": 1}
+TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were what when where "
+    "which who will with how why do does top latest today news".split()
+)
+TITLE_WEIGHT = 2  # title terms count twice towards the term frequency
+SEGMENT_COLUMNS = [
+    "terms", "offsets", "doc_ids", "tfs", "lens", "retrieved", "published", "kinds", "url_hashes", "doc_offsets",
+    "first_id",
+]
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+term_hash = lru_cache(maxsize=1 << 18)(hash64)  # term frequencies are heavily skewed, most lookups hit
+
+
+def parse_date(value: Any, default: float) -> float:
+    """
+    Converting an ISO / RFC 2822 date (as returned by DuckDuckGo news and Tavily) to epoch seconds.
+    """
+    if not value:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    for parse in (datetime.fromisoformat, parsedate_to_datetime):
+        try:
+            parsed = parse(str(value).replace("Z", "+00:00"))
+        except (TypeError, ValueError):
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return default
+
+########################################################################################################################
+
+class Segment:
+    def __init__(self, path: str):
+        """
+        Memory-mapping an immutable segment written by LocalIndex.
+        """
+        self.path = path
+        for name in SEGMENT_COLUMNS:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+        self.first_id = int(self.first_id[0])
+        self.count = len(self.lens)
+        self.url_order = np.argsort(self.url_hashes, kind="stable")
+        self.sorted_url_hashes = self.url_hashes[self.url_order]
+
+    def postings(self, term: int):
+        i = np.searchsorted(self.terms, term)
+        if i >= len(self.terms) or self.terms[i] != term:
+            return None
+        return self.doc_ids[self.offsets[i]:self.offsets[i + 1]], self.tfs[self.offsets[i]:self.offsets[i + 1]]
+
+    def find_urls(self, url_hashes: np.ndarray) -> Dict[int, List[int]]:
+        lo = np.searchsorted(self.sorted_url_hashes, url_hashes, "left")
+        hi = np.searchsorted(self.sorted_url_hashes, url_hashes, "right")
+        return {
+            int(url_hashes[i]): [self.first_id + int(j) for j in self.url_order[lo[i]:hi[i]]]
+            for i in np.flatnonzero(hi > lo)
+        }
+
+
+def write_segment(path: str, term_hashes, doc_ids, tfs, columns: Dict[str, np.ndarray], first_id: int):
+    """
+    Sorting (term, doc, tf) triples by term and writing them with the per-document columns as .npy files.
+    """
+    os.makedirs(path, exist_ok=True)
+    order = np.argsort(term_hashes, kind="stable")  # stable keeps doc ids ascending within each term
+    term_hashes, doc_ids, tfs = term_hashes[order], doc_ids[order], tfs[order]
+    terms, starts = np.unique(term_hashes, return_index=True)
+    arrays = {
+        "terms": terms.astype(np.uint64),
+        "offsets": np.append(starts, len(term_hashes)).astype(np.int64),
+        "doc_ids": doc_ids.astype(np.uint32),
+        "tfs": np.minimum(tfs, np.iinfo(np.uint16).max).astype(np.uint16),
+        "first_id": np.array([first_id], dtype=np.int64),
+        **columns,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+
+
+class LocalIndex:
+    def __init__(self, path: str, flush_every: int = 10_000, max_segments: int = 8, k1: float = 1.2, b: float = 0.75):
+        """
+        Incrementally updated BM25 index (title + body) over search and news results, persisted under path.
+        """
+        self.path = os.path.expanduser(path)
+        self.flush_every = flush_every
+        self.max_segments = max_segments
+        self.k1, self.b = k1, b
+        self.lock = threading.RLock()
+        self.segments: List[Segment] = []
+        self.tombstones = set()
+        self.tombstone_array = np.zeros(0, dtype=np.int64)
+        self.docs_file = None
+        self.next_id = 0
+        self.total_len = 0
+        self._reset_buffer()
+        self.read_only = not self._lock_directory()  # another process is writing: search what is on disk, add nothing
+        self._load()
+        atexit.register(self.flush)
+
+    def close(self):
+        """
+        Flushing the buffer and releasing the log and the directory lock.
+        """
+        self.flush()
+        with self.lock:
+            if self.docs_file is not None:
+                self.docs_file.close()
+                self.docs_file = None
+            self.lock_file.close()  # closing the descriptor drops the flock
+        atexit.unregister(self.flush)
+
+    def _lock_directory(self) -> bool:
+        os.makedirs(self.path, exist_ok=True)
+        self.lock_file = open(os.path.join(self.path, "LOCK"), "a")
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def _reset_buffer(self):
+        self.buffer_postings = defaultdict(list)  # term hash -> [(doc_id, tf)]
+        self.buffer_docs = []  # per-document column values, in id order
+        self.buffer_urls = {}  # url hash -> doc id
+
+    def _load(self):
+        found = []
+        for name in os.listdir(self.path):
+            if not name.startswith("seg_"):
+                continue
+            if name.endswith(".merging"):  # a merge interrupted before it was published; its inputs are intact
+                if not self.read_only:
+                    shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+                continue
+            found.append(Segment(os.path.join(self.path, name)))
+
+        # a merge interrupted after it was published leaves its inputs behind, covered by the merged segment
+        covered_end = 0
+        for segment in sorted(found, key=lambda s: (s.first_id, -s.count)):
+            if segment.first_id < covered_end:
+                if not self.read_only:
+                    shutil.rmtree(segment.path, ignore_errors=True)
+                continue
+            self.segments.append(segment)
+            covered_end = segment.first_id + segment.count
+        for segment in self.segments:
+            self.total_len += int(segment.lens.sum())
+        self.next_id = self.segments[-1].first_id + self.segments[-1].count if self.segments else 0
+
+        tombstones_path = os.path.join(self.path, "tombstones.u32")
+        if os.path.exists(tombstones_path):
+            self.tombstones = set(np.fromfile(tombstones_path, dtype=np.uint32).tolist())
+            self.tombstone_array = np.fromiter(self.tombstones, dtype=np.int64)
+
+        # replaying documents written to the log but not yet flushed into a segment
+        docs_path = os.path.join(self.path, "docs.jsonl")
+        if os.path.exists(docs_path):
+            start = int(self.segments[-1].doc_offsets[-1]) if self.segments else 0
+            with open(docs_path, "rb") as f:
+                f.seek(start)
+                if self.segments:
+                    f.readline()  # the last flushed document
+                offset = f.tell()
+                for line in f:
+                    try:
+                        doc = orjson.loads(line) if line.endswith(b"\n") else None
+                    except orjson.JSONDecodeError:
+                        doc = None
+                    if doc is None:
+                        break  # a torn write at the end of the log
+                    self._buffer(doc, offset)
+                    offset += len(line)
+                torn = f.tell() > offset
+            if torn and not self.read_only:
+                os.truncate(docs_path, offset)  # so the next document starts on a fresh line
+
+    def _open_docs(self):
+        if self.docs_file is None:
+            os.makedirs(self.path, exist_ok=True)
+            self.docs_file = open(os.path.join(self.path, "docs.jsonl"), "ab")
+        return self.docs_file
+
+    def _buffer(self, doc: Dict[str, Any], offset: int):
+        title_counts = Counter(tokenize(doc["title"]))
+        counts = Counter(tokenize(doc["body"]))
+        for term, tf in title_counts.items():
+            counts[term] += TITLE_WEIGHT * tf
+        doc_id = doc["id"]
+        for term, tf in counts.items():
+            self.buffer_postings[term_hash(term)].append((doc_id, tf))
+        length = sum(counts.values())
+        url_hash = hash64(doc["url"])
+        self.buffer_docs.append((length, doc["retrieved"], doc["published"], KINDS.get(doc["kind"], 0), url_hash, offset))
+        self.buffer_urls[url_hash] = doc_id
+        self.next_id = doc_id + 1
+        self.total_len += length
+
+    def _segment_ids_for_urls(self, url_hashes: List[int]) -> Dict[int, List[int]]:
+        found = defaultdict(list)
+        hashes = np.array(url_hashes, dtype=np.uint64)
+        for segment in self.segments:
+            for url_hash, ids in segment.find_urls(hashes).items():
+                found[url_hash].extend(ids)
+        return found
+
+    def _ids_for_url(self, url_hash: int, segment_ids: Dict[int, List[int]]) -> List[int]:
+        ids = list(segment_ids.get(url_hash, []))
+        if url_hash in self.buffer_urls:
+            ids.append(self.buffer_urls[url_hash])
+        return [doc_id for doc_id in ids if doc_id not in self.tombstones]
+
+    def add(self, results: List[Dict[str, Any]], kind: str = "text", retrieved: Optional[float] = None) -> int:
+        """
+        Adding normalized search results; a URL seen before replaces its older version. Returns the number added.
+        """
+        if self.read_only:
+            return 0
+        retrieved = retrieved or time.time()
+        added = 0
+        with self.lock:
+            docs_file = self._open_docs()
+            url_hashes = [hash64(result.get("url") or result.get("href") or "") for result in results]
+            segment_ids = self._segment_ids_for_urls(url_hashes)  # one vectorized lookup per segment for the batch
+            for result, url_hash in zip(results, url_hashes):
+                url = result.get("url") or result.get("href") or ""
+                title = result.get("title") or ""
+                body = result.get("body") or result.get("content") or ""
+                if not url or not (title or body):
+                    continue
+                superseded = self._ids_for_url(url_hash, segment_ids)
+                if superseded and self.document(superseded[-1])["body"] == body:
+                    continue  # same content already indexed
+                doc = {
+                    "id": self.next_id, "url": url, "title": title, "body": body, "kind": kind,
+                    "source": result.get("source", ""), "date": result.get("date", ""),
+                    "retrieved": retrieved, "published": parse_date(result.get("date"), retrieved),
+                }
+                offset = docs_file.tell()
+                docs_file.write(orjson.dumps(doc) + b"\n")
+                self._buffer(doc, offset)
+                self._delete(superseded)
+                added += 1
+            docs_file.flush()
+            if len(self.buffer_docs) >= self.flush_every:
+                self.flush()
+        return added
+
+    def _delete(self, doc_ids: List[int]):
+        if not doc_ids:
+            return
+        self.tombstones.update(doc_ids)
+        self.tombstone_array = np.fromiter(self.tombstones, dtype=np.int64)
+        with open(os.path.join(self.path, "tombstones.u32"), "ab") as f:
+            np.array(doc_ids, dtype=np.uint32).tofile(f)
+
+    def flush(self):
+        """
+        Writing the in-memory buffer as a new segment, merging segments when there are too many.
+        """
+        with self.lock:
+            if self.read_only or not self.buffer_docs:
+                return
+            first_id = self.next_id - len(self.buffer_docs)
+            term_hashes, doc_ids, tfs = [], [], []
+            for term, postings in self.buffer_postings.items():
+                for doc_id, tf in postings:
+                    term_hashes.append(term)
+                    doc_ids.append(doc_id)
+                    tfs.append(tf)
+            lens, retrieved, published, kinds, url_hashes, offsets = zip(*self.buffer_docs)
+            columns = {
+                "lens": np.array(lens, dtype=np.uint32),
+                "retrieved": np.array(retrieved, dtype=np.float64),
+                "published": np.array(published, dtype=np.float64),
+                "kinds": np.array(kinds, dtype=np.uint8),
+                "url_hashes": np.array(url_hashes, dtype=np.uint64),
+                "doc_offsets": np.array(offsets, dtype=np.int64),
+            }
+            path = os.path.join(self.path, f"seg_{first_id:010d}")
+            write_segment(
+                path, np.array(term_hashes, dtype=np.uint64), np.array(doc_ids, dtype=np.uint32),
+                np.array(tfs, dtype=np.uint32), columns, first_id,
+            )
+            self.segments.append(Segment(path))
+            self._reset_buffer()
+            if len(self.segments) > self.max_segments:
+                self.compact()
+
+    def compact(self):
+        """
+        Merging all segments into one, dropping postings of superseded documents.
+        """
+        with self.lock:
+            if self.read_only or len(self.segments) < 2:
+                return
+            old = self.segments
+            term_hashes = np.concatenate([np.repeat(s.terms, np.diff(s.offsets)) for s in old])
+            doc_ids = np.concatenate([s.doc_ids for s in old])
+            tfs = np.concatenate([s.tfs for s in old]).astype(np.uint32)
+            if self.tombstones:
+                keep = ~np.isin(doc_ids, self.tombstone_array)
+                term_hashes, doc_ids, tfs = term_hashes[keep], doc_ids[keep], tfs[keep]
+            # segments are in id order, so sorting by doc id first keeps postings ascending after the stable term sort
+            order = np.argsort(doc_ids, kind="stable")
+            columns = {
+                name: np.concatenate([getattr(s, name) for s in old])
+                for name in ["lens", "retrieved", "published", "kinds", "url_hashes", "doc_offsets"]
+            }
+            # written under a temporary name and published by an atomic rename before the inputs are removed;
+            # _load drops a leftover .merging directory, or inputs already covered by a published merge
+            end_id = old[-1].first_id + old[-1].count
+            final_path = os.path.join(self.path, f"seg_{old[0].first_id:010d}-{end_id:010d}")
+            path = final_path + ".merging"
+            shutil.rmtree(path, ignore_errors=True)
+            write_segment(path, term_hashes[order], doc_ids[order], tfs[order], columns, old[0].first_id)
+            os.rename(path, final_path)
+            for segment in old:
+                shutil.rmtree(segment.path, ignore_errors=True)
+            self.segments = [Segment(final_path)]
+
+    ####################################################################################################################
+
+    def __len__(self) -> int:
+        return self.next_id - len(self.tombstones)
+
+    def document(self, doc_id: int) -> Dict[str, Any]:
+        """
+        Reading a stored document back from the log.
+        """
+        for segment in self.segments:
+            if segment.first_id <= doc_id < segment.first_id + segment.count:
+                offset = int(segment.doc_offsets[doc_id - segment.first_id])
+                break
+        else:
+            offset = self.buffer_docs[doc_id - (self.next_id - len(self.buffer_docs))][5]
+        self._open_docs().flush()
+        with open(os.path.join(self.path, "docs.jsonl"), "rb") as f:
+            f.seek(offset)
+            return orjson.loads(f.readline())
+
+    def _score_block(self, postings, count: int, first_id: int, lens, idfs, avgdl: float):
+        scores = np.zeros(count, dtype=np.float32)
+        matched = np.zeros(count, dtype=np.uint8)
+        for (ids, tfs), idf in zip(postings, idfs):
+            if ids is None:
+                continue
+            local = ids.astype(np.int64) - first_id
+            tf = tfs.astype(np.float32)
+            dl = lens[local].astype(np.float32)
+            scores[local] += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * dl / avgdl))
+            matched[local] += 1
+        return scores, matched
+
+    def search(
+        self,
+        query: str,
+        max_results: int = 5,
+        kind: Optional[str] = None,
+        max_age: Optional[float] = None,
+        min_coverage: float = 0.0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returning the top BM25 matches, optionally restricted to one kind and to documents newer than max_age seconds.
+        min_coverage is the fraction of query terms a document must contain.
+        """
+        terms = list(dict.fromkeys(term_hash(t) for t in tokenize(query)))
+        if not terms:
+            return []
+        with self.lock:
+            if self.next_id == 0:
+                return []
+            n_docs = max(len(self), 1)
+            avgdl = max(self.total_len / max(self.next_id, 1), 1.0)
+            needed = max(1, math.ceil(min_coverage * len(terms)))
+            now = time.time()
+
+            blocks = [
+                (s.first_id, s.count, s.lens, s.published, s.retrieved, s.kinds, [s.postings(t) or (None, None) for t in terms])
+                for s in self.segments
+            ]
+            if self.buffer_docs:
+                lens, retrieved, published, kinds = (np.array(c) for c in list(zip(*self.buffer_docs))[:4])
+                postings = []
+                for t in terms:
+                    pairs = self.buffer_postings.get(t)
+                    postings.append((np.array([p[0] for p in pairs]), np.array([p[1] for p in pairs])) if pairs else (None, None))
+                blocks.append((self.next_id - len(self.buffer_docs), len(lens), lens, published, retrieved, kinds, postings))
+
+            dfs = [sum(len(block[6][i][0]) for block in blocks if block[6][i][0] is not None) for i in range(len(terms))]
+            idfs = [math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) for df in dfs]
+
+            candidates = []
+            for first_id, count, lens, published, retrieved, kinds, postings in blocks:
+                scores, matched = self._score_block(postings, count, first_id, lens, idfs, avgdl)
+                mask = matched >= needed
+                if kind is not None:
+                    mask &= np.asarray(kinds) == KINDS[kind]
+                if max_age is not None:
+                    mask &= np.maximum(np.asarray(published), np.asarray(retrieved)) >= now - max_age
+                scores[~mask] = 0
+                dead = self.tombstone_array[(self.tombstone_array >= first_id) & (self.tombstone_array < first_id + count)]
+                scores[dead - first_id] = 0
+                top = np.flatnonzero(scores)
+                if len(top) > max_results:
+                    top = top[np.argpartition(-scores[top], max_results - 1)[:max_results]]
+                candidates.extend((float(scores[i]), first_id + int(i)) for i in top)
+
+            candidates.sort(reverse=True)
+            results = []
+            for score, doc_id in candidates[:max_results]:
+                doc = self.document(doc_id)
+                doc["score"] = round(score, 4)
+                results.append(doc)
+            return results
+
+    def stats(self) -> Dict[str, Any]:
+        size = 0
+        for root, _, files in os.walk(self.path):
+            size += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        return {
+            "documents": len(self), "segments": len(self.segments), "buffered": len(self.buffer_docs),
+            "disk_bytes": size, "read_only": self.read_only,
+        }
@@ -0,0 +1,239 @@
+import os
+import time
+import threading
+import openai
+from collections import defaultdict
+from typing import List, Union, Optional, Dict, Any, Iterator, Callable
+
+from Usage_r1 import UsageMeter, usage_counts
+
+########################################################################################################################
+# Model routing
+#
+# Auxiliary calls (summarizing observations, drafting tool schemas, ...) do not need the big model. A route sends a
+# call category to another model / endpoint - e.g. a local ollama server through its OpenAI-compatible API - and
+# the call falls back to the client's default model if the routed one fails.
+
+ROUTES = ("planning", "tool_selection", "summarization", "schema_drafting")
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434/v1")
+
+
+class ModelRoute:
+    def __init__(
+        self,
+        model: str,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        timeout: float = 30.0,
+    ):
+        """
+        A model for one call category; base_url / api_key default to the client's own.
+        """
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+
+    @classmethod
+    def ollama(cls, model: str = "llama3.2:3b", **kwargs) -> "ModelRoute":
+        return cls(model, base_url=OLLAMA_BASE_URL, api_key="ollama", **kwargs)
+
+########################################################################################################################
+
+class ChatClient:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = "https://api.groq.com/openai/v1",
+        model: str = "llama-3.1-70b-versatile",
+        temperature: float = 0.0,
+        max_tokens: int = 512,
+        stream: bool = False,
+        routes: Optional[Dict[str, ModelRoute]] = None,
+    ):
+        """
+        Initializing the chat client with default settings.
+        """
+        self.api_key = api_key or os.environ.get("GROQ_API_KEY")
+        self.base_url = base_url
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.stream = stream
+        self.tools = []  #  tools as an empty list in the begining
+        self.routes = routes or {}  # call category -> ModelRoute, unrouted categories use the default model
+        unknown = set(self.routes) - set(ROUTES)
+        if unknown:
+            raise ValueError(f"Unknown route categories {sorted(unknown)}; expected some of {ROUTES}.")
+
+        # Initializing OpenAI client
+        self.client = openai.OpenAI(
+            base_url=self.base_url,
+            api_key=self.api_key,
+        )
+        self._route_clients: Dict[tuple, openai.OpenAI] = {}
+        self.route_stats: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {"calls": 0, "failures": 0, "fallbacks": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+        )
+        self._stats_lock = threading.Lock()
+
+    def bind_tools(self, tools: List[Dict[str, Any]]):
+        """
+        Binding tools to the chat client.
+        """
+        self.tools = tools
+
+    def _messages(self, message: Union[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        # This is to facilitate single query input, for testing etc.
+        if isinstance(message, str):
+            return [
+                {"role": "system", "content": "you are a helpful assistant."},
+                {"role": "user", "content": message}
+            ]
+        return message
+
+    def _target(self, route: Optional[str]):
+        """
+        Returning (openai client, model, max_tokens) for a call category.
+        """
+        config = self.routes.get(route) if route else None
+        if config is None:
+            return self.client, self.model, self.max_tokens
+        key = (config.base_url or self.base_url, config.api_key or self.api_key, config.timeout)
+        if key not in self._route_clients:
+            self._route_clients[key] = openai.OpenAI(base_url=key[0], api_key=key[1], timeout=config.timeout, max_retries=0)
+        return self._route_clients[key], config.model, config.max_tokens or self.max_tokens
+
+    def _params(self, messages, model: str, max_tokens: int, stream: bool) -> Dict[str, Any]:
+        # Preparing the API call parameters
+        params = {
+            "messages": messages,
+            "model": model,
+            "temperature": self.temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+        }
+
+        if self.tools:  # Including tools only if bind_tool use to add tools
+            params["tools"] = self.tools
+            params["tool_choice"] = 'auto'  # Set tool_choice as needed
+        return params
+
+    def _record(self, name: str, seconds: float, usage=None, failed: bool = False, fell_back: bool = False):
+        with self._stats_lock:
+            stats = self.route_stats[name]
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["failures"] += int(failed)
+            stats["fallbacks"] += int(fell_back)
+            counts = usage_counts(usage)
+            if counts is not None:
+                stats["prompt_tokens"] += counts[0]
+                stats["completion_tokens"] += counts[1]
+
+    def run(
+        self,
+        message: Union[str, List[Dict[str, Any]]],
+        route: Optional[str] = None,
+        meter: Optional[UsageMeter] = None,
+    ) -> Dict[str, Any]:
+        """
+        Running the chat client with specified message(s), returning the assistant's response.
+        route picks the model for the call category (see ROUTES); a failing routed model falls back to the default.
+        meter, when given, gets the call's token usage and latency.
+        """
+        messages = self._messages(message)
+        name = route or "default"
+
+        if route in self.routes:
+            client, model, max_tokens = self._target(route)
+            start = time.perf_counter()
+            try:
+                chat_completion = client.chat.completions.create(**self._params(messages, model, max_tokens, self.stream))
+                self._record(name, time.perf_counter() - start, chat_completion.usage)
+                if meter is not None:
+                    meter.record(messages, chat_completion.usage, time.perf_counter() - start, chat_completion.choices[0].message.content)
+                return chat_completion.choices[0].message
+            except openai.OpenAIError:
+                self._record(name, time.perf_counter() - start, failed=True)
+            name = f"{name}:fallback"
+
+        # Calling client to generate response
+        start = time.perf_counter()
+        try:
+            chat_completion = self.client.chat.completions.create(**self._params(messages, self.model, self.max_tokens, self.stream))
+        except openai.OpenAIError:
+            self._record(name, time.perf_counter() - start, failed=True, fell_back=name.endswith(":fallback"))
+            raise
+        self._record(name, time.perf_counter() - start, chat_completion.usage, fell_back=name.endswith(":fallback"))
+        if meter is not None:
+            meter.record(messages, chat_completion.usage, time.perf_counter() - start, chat_completion.choices[0].message.content)
+
+        # Returning assistant's response
+        return chat_completion.choices[0].message
+
+    def _stream_params(self, client: openai.OpenAI, messages, model: str, max_tokens: int) -> Dict[str, Any]:
+        params = self._params(messages, model, max_tokens, True)
+        if "groq.com" not in str(client.base_url):  # Groq reports usage in x_groq on its own, and rejects stream_options
+            params["stream_options"] = {"include_usage": True}
+        return params
+
+    def run_stream(
+        self,
+        message: Union[str, List[Dict[str, Any]]],
+        route: Optional[str] = None,
+        meter: Optional[UsageMeter] = None,
+    ) -> Iterator[str]:
+        """
+        Running the chat client in streaming mode, yielding the assistant's content as it is generated.
+        Falls back to the default model only if the routed model fails before producing any output.
+        """
+        messages = self._messages(message)
+        name = route or "default"
+        client, model, max_tokens = self._target(route)
+        start = time.perf_counter()
+        try:
+            chunks = client.chat.completions.create(**self._stream_params(client, messages, model, max_tokens))
+        except openai.OpenAIError:
+            if route not in self.routes:
+                raise
+            self._record(name, time.perf_counter() - start, failed=True)
+            name = f"{name}:fallback"
+            start = time.perf_counter()
+            try:
+                chunks = self.client.chat.completions.create(**self._stream_params(self.client, messages, self.model, self.max_tokens))
+            except openai.OpenAIError:
+                self._record(name, time.perf_counter() - start, failed=True, fell_back=True)
+                raise
+
+        deltas, usage = [], None
+        for chunk in chunks:
+            # usage arrives on the last chunk, as `usage` (OpenAI, ollama) or under `x_groq` (Groq)
+            usage = getattr(chunk, "usage", None) or (getattr(chunk, "x_groq", None) or {}).get("usage") or usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                deltas.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+        self._record(name, time.perf_counter() - start, usage, fell_back=name.endswith(":fallback"))
+        if meter is not None:
+            meter.record(messages, usage, time.perf_counter() - start, "".join(deltas))
+
+    def as_llm(self, route: Optional[str] = None, meter: Optional[UsageMeter] = None) -> Callable[..., str]:
+        """
+        Returning a call_llm-style function (message -> text) bound to a route, e.g. for get_tool_specifications.
+        """
+        def llm(message: Union[str, List[Dict[str, Any]]]) -> str:
+            return self.run(message, route=route, meter=meter).content
+
+        return llm
+
+    def route_report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returning per-route call counts, failures, fallbacks, mean latency and token totals.
+        """
+        with self._stats_lock:
+            return {
+                name: {**stats, "mean_seconds": stats["seconds"] / stats["calls"] if stats["calls"] else 0.0}
+                for name, stats in self.route_stats.items()
+            }
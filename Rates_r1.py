@@ -0,0 +1,205 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Dict, Optional, Union
+
+import numpy as np
+import requests
+
+try:
+    import fcntl
+except ImportError:  # no inter-process lock on Windows
+    fcntl = None
+
+########################################################################################################################
+# Historical exchange-rate store
+#
+# A (day x currency) float64 matrix of "units of currency per 1 USD", memory-mapped from <path>/rates.f64. Row i is
+# START_DATE + i days, columns follow the order in <path>/meta.json. Missing days (weekends, holidays, not fetched
+# yet) are NaN and are forward-filled at lookup time, up to max_gap days.
+# Several processes may share a store: writers serialize on an flock of <path>/LOCK and re-read meta.json under it, so
+# a currency added by another process keeps the column that process gave it.
+
+START_DATE = np.datetime64("1999-01-01", "D")  # first ECB reference rates
+MAX_CURRENCIES = 192
+HISTORY_URL = "https://api.frankfurter.app"  # ECB daily reference rates, no key needed
+
+DateLike = Union[str, date, np.datetime64]
+
+
+def day_index(dates) -> np.ndarray:
+    """
+    Converting dates (strings, date objects or datetime64) to row numbers.
+    """
+    return (np.asarray(dates, dtype="datetime64[D]") - START_DATE).astype(np.int64)
+
+
+class RateStore:
+    def __init__(self, path: str, max_gap: int = 7):
+        """
+        Opening (or creating) the on-disk rate matrix under path.
+        """
+        self.path = os.path.expanduser(path)
+        self.max_gap = max_gap
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        self._load_meta()
+        self.matrix = self._map()
+
+    def _load_meta(self):
+        meta_path = os.path.join(self.path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.currencies = json.load(f)["currencies"]
+        else:
+            self.currencies = ["USD"]
+        self.columns = {code: i for i, code in enumerate(self.currencies)}
+
+    @contextmanager
+    def _write_lock(self):
+        """
+        Holding the thread lock and an exclusive flock on the store directory while writing.
+        """
+        with self.lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, "LOCK"), "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield  # closing the file releases the flock
+
+    def _map(self) -> np.ndarray:
+        data_path = os.path.join(self.path, "rates.f64")
+        if not os.path.exists(data_path) or os.path.getsize(data_path) == 0:
+            return np.full((0, MAX_CURRENCIES), np.nan)
+        rows = os.path.getsize(data_path) // (8 * MAX_CURRENCIES)
+        return np.memmap(data_path, dtype=np.float64, mode="r", shape=(rows, MAX_CURRENCIES))
+
+    def _save_meta(self):
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"currencies": self.currencies, "start_date": str(START_DATE)}, f)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    @property
+    def last_date(self) -> Optional[np.datetime64]:
+        valid = np.flatnonzero(~np.isnan(self.matrix[:, 0])) if len(self.matrix) else []
+        return START_DATE + int(valid[-1]) if len(valid) else None
+
+    ####################################################################################################################
+
+    def add_rates(self, tables: Dict[str, Dict[str, float]]):
+        """
+        Storing daily rate tables {date: {currency: units per 1 USD}}, appending rows at the end of the file as needed.
+        """
+        if not tables:
+            return
+        if int(day_index(min(tables))) < 0:
+            raise ValueError(f"Rates before {START_DATE} cannot be stored (got {min(tables)}).")
+        with self._write_lock():
+            self._load_meta()  # another process may have added currencies since this one last looked
+            new_codes = sorted({code for table in tables.values() for code in table} - set(self.columns))
+            if len(self.currencies) + len(new_codes) > MAX_CURRENCIES:
+                raise ValueError("Too many currencies for the rate store.")
+            for code in new_codes:
+                self.columns[code] = len(self.currencies)
+                self.currencies.append(code)
+            if new_codes:
+                self._save_meta()
+
+            data_path = os.path.join(self.path, "rates.f64")
+            self.matrix = self._map()  # rows appended by another process
+            rows_needed = max(int(day_index(max(tables))) + 1, len(self.matrix))
+            if rows_needed > len(self.matrix):
+                # appending NaN rows up to the newest day, then remapping
+                with open(data_path, "ab") as f:
+                    np.full((rows_needed - len(self.matrix), MAX_CURRENCIES), np.nan).tofile(f)
+            matrix = np.memmap(data_path, dtype=np.float64, mode="r+", shape=(rows_needed, MAX_CURRENCIES))
+            for day, table in tables.items():
+                row = int(day_index(day))
+                matrix[row, self.columns["USD"]] = 1.0
+                for code, rate in table.items():
+                    matrix[row, self.columns[code]] = rate
+            matrix.flush()
+            del matrix
+            self.matrix = self._map()
+
+    def fetch(self, start: DateLike, end: Optional[DateLike] = None, timeout: float = 20.0) -> int:
+        """
+        Fetching daily tables (USD base) for a day or a date range and storing them. Returns the number of days stored.
+        """
+        start = str(np.datetime64(start, "D"))
+        url = f"{HISTORY_URL}/{start}..{np.datetime64(end, 'D')}" if end is not None else f"{HISTORY_URL}/{start}"
+        response = self.session.get(url, params={"from": "USD"}, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        if "date" in data:  # single day; the API answers with the last business day on or before start
+            tables = {data["date"]: data["rates"]}
+        else:
+            tables = data.get("rates", {})
+        self.add_rates(tables)
+        return len(tables)
+
+    def update(self, until: Optional[DateLike] = None) -> int:
+        """
+        Incrementally fetching everything after the last stored day.
+        """
+        until = np.datetime64(until or date.today(), "D")
+        last = self.last_date
+        start = last + 1 if last is not None else until - 365
+        if start > until:
+            return 0
+        return self.fetch(start, until)
+
+    ####################################################################################################################
+
+    def _filled_rows(self, column: int) -> np.ndarray:
+        """
+        For each day, the row holding the most recent known rate of a currency (-1 if none).
+        """
+        known = ~np.isnan(self.matrix[:, column])
+        return np.maximum.accumulate(np.where(known, np.arange(len(known)), -1))
+
+    def rates(self, dates, codes) -> np.ndarray:
+        """
+        Vectorized lookup of "units per 1 USD" for arrays of dates and currency codes (NaN where unknown).
+        """
+        rows = day_index(dates)
+        codes = np.asarray(codes)
+        rows, codes = np.broadcast_arrays(rows, codes)
+        out = np.full(rows.shape, np.nan)
+        in_range = rows >= 0
+        if not len(self.matrix):
+            return out
+        unique_codes, inverse = np.unique(codes, return_inverse=True)
+        inverse = inverse.reshape(codes.shape)
+        for i, code in enumerate(unique_codes):
+            column = self.columns.get(str(code).upper())
+            if column is None:
+                continue
+            select = in_range & (inverse == i)
+            wanted = rows[select]
+            filled = self._filled_rows(column)[np.minimum(wanted, len(self.matrix) - 1)]
+            usable = (filled >= 0) & (wanted - filled <= self.max_gap)  # also covers days after the last stored one
+            out[select] = np.where(usable, self.matrix[np.maximum(filled, 0), column], np.nan)
+        return out
+
+    def convert(self, dates, amounts, sources, targets) -> np.ndarray:
+        """
+        Converting arrays of (date, amount, source, target) with stored rates only - no network I/O. NaN where a
+        rate is not available.
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        return amounts * self.rates(dates, targets) / self.rates(dates, sources)
+
+    def convert_one(self, amount: float, source: str, target: str, on: DateLike, fetch_missing: bool = True) -> float:
+        """
+        Converting a single amount, fetching that day's table first if the store does not cover it.
+        """
+        value = float(self.convert([np.datetime64(on, "D")], [amount], [source.upper()], [target.upper()])[0])
+        if np.isnan(value) and fetch_missing:
+            self.fetch(on)
+            value = float(self.convert([np.datetime64(on, "D")], [amount], [source.upper()], [target.upper()])[0])
+        return value
+
@@ -0,0 +1,242 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from duckduckgo_search import DDGS
+
+from Index_r1 import LocalIndex
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+########################################################################################################################
+# Backends - each returns a list of results normalized to {title, url, body, source, date, backend}
+
+def normalize_result(item: Dict[str, Any], backend: str) -> Dict[str, Any]:
+    """
+    Mapping the DuckDuckGo (text / news) and Tavily result fields to one schema.
+    """
+    return {
+        "title": item.get("title", ""),
+        "url": item.get("url") or item.get("href", ""),
+        "body": item.get("body") or item.get("content", ""),
+        "source": item.get("source", ""),
+        "date": item.get("date") or item.get("published_date", ""),
+        "backend": backend,
+    }
+
+
+def ddg_backend(query: str, max_results: int = 4, kind: str = "text", timeout: int = 10) -> List[Dict[str, Any]]:
+    ddgs = DDGS(headers=DEFAULT_HEADERS, timeout=timeout)
+    if kind == "news":
+        results = ddgs.news(keywords=query, max_results=int(max_results))
+    else:
+        results = ddgs.text(keywords=query, max_results=int(max_results))
+    return [normalize_result(r, "ddg") for r in results or []]
+
+
+def tavily_backend(query: str, max_results: int = 4, kind: str = "text", timeout: int = 10) -> List[Dict[str, Any]]:
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        raise RuntimeError("Missing Tavily API key. Set TAVILY_API_KEY environment variable.")
+
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    params = {"query": query, "limit": max_results}
+    if kind == "news":
+        params["topic"] = "news"
+
+    response = requests.get("https://api.tavily.com/search", headers=headers, params=params, timeout=timeout)
+    response.raise_for_status()
+    return [normalize_result(r, "tavily") for r in response.json().get("results", [])]
+
+########################################################################################################################
+
+class LatencyTracker:
+    def __init__(self, window: int = 50, percentile: float = 0.9, default: float = 2.0, min_samples: int = 5):
+        """
+        Keeping a sliding window of successful latencies to derive the hedging delay.
+        """
+        self.samples = deque(maxlen=window)
+        self.percentile = percentile
+        self.default = default
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def hedge_delay(self) -> float:
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return self.default
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        """
+        Opening after consecutive failures; one trial request is let through after reset_timeout (half-open).
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == "open":
+                return False
+            if self.state == "half-open":
+                # let exactly one trial through, re-arming the timer until it reports back
+                self.opened_at = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+########################################################################################################################
+
+class HedgedSearch:
+    def __init__(
+        self,
+        backends: Optional[Dict[str, Callable]] = None,
+        order: Optional[List[str]] = None,
+        percentile: float = 0.9,
+        default_delay: float = 2.0,
+        timeout: int = 10,
+        max_workers: int = 8,
+        index: Optional[LocalIndex] = None,
+        max_age: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Search front-end: sends the query to the primary backend and hedges to the secondary when the primary is slower
+        than its learned latency percentile; whichever answers first wins.
+        When an index is given it is consulted first (within max_age seconds per kind) and fed every network result.
+        """
+        self.index = index
+        self.max_age = max_age or {"text": 7 * 24 * 3600, "news": 6 * 3600}
+        self.backends = backends or {"ddg": ddg_backend, "tavily": tavily_backend}
+        self.order = order or list(self.backends)
+        self.timeout = timeout
+        self.latency = {name: LatencyTracker(percentile=percentile, default=default_delay) for name in self.backends}
+        self.breakers = {name: CircuitBreaker() for name in self.backends}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+        self.stats = {"requests": 0, "local_hits": 0, "hedged": 0, "hedge_wins": 0, "failures": 0, "index_errors": 0}
+
+    def _call(self, name: str, query: str, max_results: int, kind: str) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        try:
+            results = self.backends[name](query, max_results=max_results, kind=kind, timeout=self.timeout)
+        except Exception:
+            self.breakers[name].record_failure()
+            raise
+        self.breakers[name].record_success()
+        self.latency[name].record(time.perf_counter() - start)
+        return results
+
+    def _next_backend(self, names) -> Optional[str]:
+        # allow() is only asked of a backend about to be called: in half-open state it hands out the single trial
+        for name in names:
+            if self.breakers[name].allow():
+                return name
+        return None
+
+    def search(self, query: str, max_results: int = 4, kind: str = "text") -> List[Dict[str, Any]]:
+        """
+        Returning normalized results from the first backend to answer, topped up with fresh local matches and any other
+        backend answer already in, deduplicated by URL across all of them.
+        """
+        self.stats["requests"] += 1
+        local = []
+        if self.index is not None:
+            local = self.index.search(query, max_results, kind=kind, max_age=self.max_age.get(kind), min_coverage=1.0)
+            local = [{**normalize_result(doc, "local"), "score": doc["score"]} for doc in local]
+            if len(local) >= max_results:
+                self.stats["local_hits"] += 1
+                return local
+
+        remaining = iter(self.order)
+        primary = self._next_backend(remaining)
+        if primary is None:
+            raise RuntimeError("All search backends are unavailable (circuit open).")
+
+        pending = {self.executor.submit(self._call, primary, query, max_results, kind): primary}
+        done, _ = wait(pending, timeout=self.latency[primary].hedge_delay())
+
+        # firing the hedged request only if the primary has not answered (or already failed)
+        if not done or next(iter(done)).exception() is not None:
+            hedge = self._next_backend(remaining)
+            if hedge is not None:
+                pending[self.executor.submit(self._call, hedge, query, max_results, kind)] = hedge
+                self.stats["hedged"] += 1
+
+        errors = []
+        while pending:
+            done, _ = wait(pending, timeout=self.timeout + 1, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            answered = []
+            for future in sorted(done, key=lambda f: self.order.index(pending[f])):
+                name = pending.pop(future)
+                if future.exception() is not None:
+                    errors.append(f"{name}: {future.exception()}")
+                else:
+                    answered.append((name, future.result()))
+            if not answered:
+                continue
+            if answered[0][0] != primary:
+                self.stats["hedge_wins"] += 1
+            for loser in pending:
+                loser.cancel()
+            fetched = [result for _, results in answered for result in results]
+            if self.index is not None:
+                try:
+                    self.index.add(fetched, kind=kind)
+                except Exception:
+                    self.stats["index_errors"] += 1  # the results are still good, only caching them failed
+            return dedupe_by_url(fetched + local)[:max_results]
+
+        self.stats["failures"] += 1
+        raise RuntimeError("Search failed: " + ("; ".join(errors) or "timed out"))
+
+
+def dedupe_by_url(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Dropping repeated URLs (ignoring scheme, trailing slash and case), keeping the first occurrence.
+    """
+    seen = set()
+    unique = []
+    for result in results:
+        key = result["url"].lower().split("://", 1)[-1].rstrip("/")
+        if key and key in seen:
+            continue
+        seen.add(key)
+        unique.append(result)
+    return unique
@@ -0,0 +1,297 @@
+import asyncio
+import contextlib
+import json
+import time
+import uuid
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import tornado.web
+
+from Agent_r1 import Agent
+from Session_r1 import SessionStore
+
+########################################################################################################################
+# Asynchronous HTTP serving mode for Agent
+#
+#   POST /v1/chat   {"message": "...", "session_id": "...", "stream": false}
+#                   -> {"session_id": "...", "answer": "..."}            or, with stream=true, server-sent events:
+#                   -> event: delta / data: {"text": "..."}  ...  event: done / data: {"session_id": ..., "answer": ...}
+#   GET  /healthz   liveness and current load
+#   GET  /metrics   counters and latency percentiles
+#
+# Agent is synchronous, so each request runs in a worker thread. At most max_concurrency requests run at once and at
+# most max_queue wait for a slot or for their session's earlier requests; anything beyond that (or waiting longer than
+# queue_timeout) is shed with a 503.
+
+class Overloaded(Exception):
+    pass
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int = 16, max_queue: int = 64, queue_timeout: float = 10.0):
+        """
+        Bounding in-flight and queued requests, shedding load beyond that.
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+
+    async def __aenter__(self):
+        if self.slots.locked() and self.queued >= self.max_queue:
+            raise Overloaded("admission queue full")
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self.slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise Overloaded("timed out waiting in the admission queue") from None
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self.in_flight -= 1
+        self.slots.release()
+
+
+class Metrics:
+    def __init__(self, window: int = 2048):
+        self.started = time.time()
+        self.counters = {"requests": 0, "completed": 0, "errors": 0, "shed": 0, "streamed": 0}
+        self.latencies = deque(maxlen=window)  # seconds, most recent completed requests
+
+    def snapshot(self, admission: AdmissionController) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def percentile(q):
+            return round(1000 * ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2) if ordered else None
+
+        return {
+            **self.counters,
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "in_flight": admission.in_flight,
+            "queued": admission.queued,
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)},
+        }
+
+########################################################################################################################
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, server: "AgentServer"):
+        self.server = server
+
+    def write_json(self, payload: Dict[str, Any], status: int = 200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(payload))
+
+
+class ChatHandler(BaseHandler):
+    async def post(self):
+        server = self.server
+        server.metrics.counters["requests"] += 1
+        try:
+            body = json.loads(self.request.body or b"{}")
+            message = body["message"]
+        except (ValueError, KeyError):
+            return self.write_json({"error": "Body must be JSON with a 'message' field."}, 400)
+        session_id = body.get("session_id") or uuid.uuid4().hex
+        stream = bool(body.get("stream"))
+
+        start = time.perf_counter()
+        try:
+            # one request at a time per session, so the message state stays consistent; taken before admission so
+            # requests queued behind their own session do not hold slots other sessions could use
+            async with server.session_slot(session_id):
+                async with server.admission:
+                    if stream:
+                        answer = await self._run_streaming(session_id, message)
+                    else:
+                        answer = await server.run_in_worker(session_id, message, None)
+        except Overloaded as e:
+            server.metrics.counters["shed"] += 1
+            self.set_header("Retry-After", "1")
+            return self.write_json({"error": f"Server overloaded: {e}"}, 503)
+        except Exception as e:
+            server.metrics.counters["errors"] += 1
+            if self._headers_written:
+                self.write(f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n")
+                return self.finish()
+            return self.write_json({"error": str(e)}, 500)
+
+        server.metrics.counters["completed"] += 1
+        server.metrics.latencies.append(time.perf_counter() - start)
+        if stream:
+            self.write(f"event: done\ndata: {json.dumps({'session_id': session_id, 'answer': answer})}\n\n")
+            return self.finish()
+        self.write_json({"session_id": session_id, "answer": answer})
+
+    async def _run_streaming(self, session_id: str, message: str) -> str:
+        self.server.metrics.counters["streamed"] += 1
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        loop = asyncio.get_running_loop()
+        deltas: asyncio.Queue = asyncio.Queue()
+
+        def on_delta(text: str):
+            loop.call_soon_threadsafe(deltas.put_nowait, text)
+
+        task = asyncio.ensure_future(self.server.run_in_worker(session_id, message, on_delta))
+        while True:
+            getter = asyncio.ensure_future(deltas.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                break
+            self.write(f"event: delta\ndata: {json.dumps({'text': getter.result()})}\n\n")
+            await self.flush()
+        while not deltas.empty():  # deltas queued just before the run finished
+            self.write(f"event: delta\ndata: {json.dumps({'text': deltas.get_nowait()})}\n\n")
+        return await task
+
+
+class HealthHandler(BaseHandler):
+    def get(self):
+        admission = self.server.admission
+        saturated = admission.slots.locked() and admission.queued >= admission.max_queue
+        self.write_json(
+            {"status": "saturated" if saturated else "ok", "in_flight": admission.in_flight, "queued": admission.queued},
+            503 if saturated else 200,
+        )
+
+
+class MetricsHandler(BaseHandler):
+    def get(self):
+        self.write_json(self.server.metrics.snapshot(self.server.admission))
+
+########################################################################################################################
+
+class AgentServer:
+    def __init__(
+        self,
+        agent_factory: Callable[[str, SessionStore], Agent],
+        session_store: SessionStore,
+        max_concurrency: int = 16,
+        max_queue: int = 64,
+        queue_timeout: float = 10.0,
+    ):
+        """
+        Serving agents over HTTP; agent_factory(session_id, session_store) builds the Agent for a session.
+        """
+        self.agent_factory = agent_factory
+        self.session_store = session_store
+        self.admission = AdmissionController(max_concurrency, max_queue, queue_timeout)
+        self.metrics = Metrics()
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="agent")
+        self.session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.session_requests: Dict[str, int] = {}  # session id -> requests holding or waiting for its lock
+
+    def session_lock(self, session_id: str) -> asyncio.Lock:
+        lock = self.session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self.session_locks[session_id] = lock  # dropped once no request holds or waits on it
+        return lock
+
+    @contextlib.asynccontextmanager
+    async def session_slot(self, session_id: str):
+        """
+        Holding the session's lock, shedding the request if the session stays busy longer than queue_timeout.
+        """
+        admission = self.admission
+        lock = self.session_lock(session_id)
+        # waiting behind the session's earlier requests counts as queueing, so one busy session cannot pile up
+        # connections beyond max_queue
+        earlier = self.session_requests.get(session_id, 0)
+        if earlier and admission.queued >= admission.max_queue:
+            raise Overloaded("admission queue full")
+        waiting = int(earlier > 0)
+        self.session_requests[session_id] = earlier + 1
+        admission.queued += waiting
+        try:
+            try:
+                await asyncio.wait_for(lock.acquire(), timeout=admission.queue_timeout)
+            except asyncio.TimeoutError:
+                raise Overloaded("session busy with earlier requests") from None
+            finally:
+                admission.queued -= waiting
+            try:
+                yield
+            finally:
+                lock.release()
+        finally:
+            self.session_requests[session_id] -= 1
+            if not self.session_requests[session_id]:
+                del self.session_requests[session_id]
+
+    async def run_in_worker(self, session_id: str, message: str, on_delta: Optional[Callable[[str], None]]) -> str:
+        def work():
+            agent = self.agent_factory(session_id, self.session_store)
+            return agent.run(message, on_delta=on_delta)
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, work)
+
+    def make_app(self) -> tornado.web.Application:
+        return tornado.web.Application([
+            (r"/v1/chat", ChatHandler, {"server": self}),
+            (r"/healthz", HealthHandler, {"server": self}),
+            (r"/metrics", MetricsHandler, {"server": self}),
+        ])
+
+    def listen(self, port: int, address: str = ""):
+        return self.make_app().listen(port, address=address)
+
+########################################################################################################################
+
+def main():
+    import argparse
+    import os
+    from Models_r1 import ChatClient
+    from Usage_r1 import TokenBudget, UsageLedger
+    from Tools_r3 import calculate, get_news, ddg_search, get_weather
+    from tool_schemas import tools_spec
+
+    parser = argparse.ArgumentParser(description="Serve the tool-calling Agent over HTTP.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--address", default="")
+    parser.add_argument("--base-url", default=os.environ.get("LLM_BASE_URL", "https://api.groq.com/openai/v1"))
+    parser.add_argument("--model", default=os.environ.get("LLM_MODEL", "llama-3.1-70b-versatile"))
+    parser.add_argument("--sessions-dir", default="~/.cache/agent_tools/sessions")
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--queue-timeout", type=float, default=10.0)
+    parser.add_argument("--query-token-budget", type=int, default=None, help="total tokens per query")
+    parser.add_argument("--session-token-budget", type=int, default=None, help="total tokens per session")
+    args = parser.parse_args()
+
+    system_prompt = "You are an intelligent 'Assistant' and you act as 'A general purpose assistant capable of answering user questions'"
+    available_functions = {'get_news': get_news, 'ddg_search': ddg_search, 'get_weather': get_weather, "calculate": calculate}
+    client = ChatClient(base_url=args.base_url, model=args.model)
+    client.bind_tools(tools_spec)
+    usage = UsageLedger(TokenBudget(max_total_tokens=args.query_token_budget), TokenBudget(max_total_tokens=args.session_token_budget))
+
+    def agent_factory(session_id: str, session_store: SessionStore) -> Agent:
+        return Agent(system_prompt, client, available_functions, session_store=session_store, session_id=session_id,
+                     usage_meter=usage.meter(session_id))
+
+    server = AgentServer(
+        agent_factory, SessionStore(args.sessions_dir),
+        max_concurrency=args.max_concurrency, max_queue=args.max_queue, queue_timeout=args.queue_timeout,
+    )
+
+    async def serve():
+        server.listen(args.port, args.address)
+        print(f"Agent server listening on :{args.port}")
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import os
+import sys
+import hashlib
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+########################################################################################################################
+# Compact message records
+#
+# Agent.messages_state used to hold plain dicts next to full ChatCompletionMessage objects. MessageRecord keeps only
+# what the OpenAI wire format needs, in __slots__, with roles / tool names interned and large payloads kept as
+# zlib-compressed bytes. to_wire() gives back exactly the dict that from_wire() was built from.
+
+COMPRESS_ABOVE = 1024  # characters; smaller payloads stay as str (compression would not pay for its header)
+
+
+def _pack(text: Optional[str]):
+    if text is None or len(text) < COMPRESS_ABOVE:
+        return text
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def _unpack(value) -> Optional[str]:
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+def _complete_entry(line: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Parsing one log line, None if it was torn by a crash (not newline-terminated or not valid JSON).
+    """
+    if not line.endswith(b"\n"):
+        return None
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+
+
+class MessageRecord:
+    __slots__ = ("role", "content", "tool_calls", "tool_call_id", "name", "extra")
+
+    def __init__(
+        self,
+        role: str,
+        content: Optional[str] = None,
+        tool_calls: Optional[List[Dict[str, Any]]] = None,
+        tool_call_id: Optional[str] = None,
+        name: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ):
+        self.role = sys.intern(role)
+        self.content = _pack(content)
+        # (id, type, function name, packed arguments) per call
+        self.tool_calls: Optional[Tuple[Tuple[str, str, str, Any], ...]] = tuple(
+            (call["id"], sys.intern(call.get("type", "function")), sys.intern(call["function"]["name"]),
+             _pack(call["function"]["arguments"]))
+            for call in tool_calls
+        ) if tool_calls is not None else None
+        self.tool_call_id = tool_call_id
+        self.name = sys.intern(name) if name else name
+        self.extra = extra or None  # any other non-empty wire fields, kept for a lossless round trip
+
+    @classmethod
+    def from_wire(cls, message: Any) -> "MessageRecord":
+        """
+        Building a record from a wire dict or an openai ChatCompletionMessage.
+        """
+        if isinstance(message, MessageRecord):
+            return message
+        if not isinstance(message, dict):
+            # pydantic model from the openai client; None fields (refusal, audio, ...) are not part of the request
+            message = message.model_dump(exclude_none=True)
+            message.setdefault("content", None)
+        fields = dict(message)
+        record = cls(
+            role=fields.pop("role"),
+            content=fields.pop("content", None),
+            tool_calls=fields.pop("tool_calls", None),
+            tool_call_id=fields.pop("tool_call_id", None),
+            name=fields.pop("name", None),
+            extra=fields,
+        )
+        return record
+
+    def to_wire(self) -> Dict[str, Any]:
+        """
+        Returning the OpenAI chat message dict.
+        """
+        message: Dict[str, Any] = {"role": self.role, "content": _unpack(self.content)}
+        if self.tool_calls is not None:
+            message["tool_calls"] = [
+                {"id": call_id, "type": call_type, "function": {"name": name, "arguments": _unpack(arguments)}}
+                for call_id, call_type, name, arguments in self.tool_calls
+            ]
+        if self.tool_call_id is not None:
+            message["tool_call_id"] = self.tool_call_id
+        if self.name is not None:
+            message["name"] = self.name
+        if self.extra:
+            message.update(self.extra)
+        return message
+
+    @property
+    def text(self) -> Optional[str]:
+        return _unpack(self.content)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MessageRecord) and self.to_wire() == other.to_wire()
+
+    def __repr__(self) -> str:
+        return f"MessageRecord({self.to_wire()!r})"
+
+########################################################################################################################
+
+class SessionStore:
+    def __init__(self, path: str, max_live: int = 1000):
+        """
+        Persisting sessions as append-only orjson logs (one file per session), with an LRU of live sessions in memory.
+        Evicted sessions are resumed from disk on the next access.
+        """
+        self.path = os.path.expanduser(path)
+        self.max_live = max_live
+        self.live: "OrderedDict[str, List[MessageRecord]]" = OrderedDict()
+        self.lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, session_id: str) -> str:
+        # hashed, so distinct ids (which come from clients) never share a log and any length is a valid file name
+        digest = hashlib.blake2b(session_id.encode(), digest_size=16).hexdigest()
+        return os.path.join(self.path, f"{digest}.log")
+
+    def exists(self, session_id: str) -> bool:
+        return session_id in self.live or os.path.exists(self._file(session_id))
+
+    def get(self, session_id: str) -> List[MessageRecord]:
+        """
+        Returning the live message list of a session, resuming it from disk if needed (empty if new).
+        """
+        with self.lock:
+            if session_id in self.live:
+                self.live.move_to_end(session_id)
+                return self.live[session_id]
+            messages = self.load(session_id)
+            self.live[session_id] = messages
+            while len(self.live) > self.max_live:
+                self.live.popitem(last=False)  # already on disk, nothing to write
+            return messages
+
+    def load(self, session_id: str) -> List[MessageRecord]:
+        """
+        Reading a session log back into records.
+        """
+        messages: List[MessageRecord] = []
+        path = self._file(session_id)
+        good = 0  # end of the last complete record
+        try:
+            with open(path, "rb") as f:
+                for line in f:
+                    entry = _complete_entry(line)
+                    if entry is None:
+                        break  # a torn write at the end of the log
+                    messages.append(MessageRecord.from_wire(entry["m"]))
+                    good += len(line)
+                torn = f.tell() > good
+        except FileNotFoundError:
+            return messages
+        if torn:
+            os.truncate(path, good)  # so the next append starts on a fresh line
+        return messages
+
+    def append(self, session_id: str, message: Any) -> MessageRecord:
+        """
+        Adding a message to a session and to its log.
+        """
+        record = MessageRecord.from_wire(message)
+        messages = self.get(session_id)
+        with self.lock:
+            messages.append(record)
+            with open(self._file(session_id), "ab") as f:
+                f.write(orjson.dumps({"m": record.to_wire()}) + b"\n")
+        return record
+
+    def snapshot(self, session_id: str):
+        """
+        Rewriting the log from the in-memory messages (atomic replace), e.g. after they were edited or trimmed.
+        """
+        messages = self.get(session_id)
+        with self.lock:
+            tmp_path = self._file(session_id) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(orjson.dumps({"m": record.to_wire()}) + b"\n" for record in messages))
+            os.replace(tmp_path, self._file(session_id))
+
+    def evict(self, session_id: str):
+        """
+        Dropping a session from memory; it stays on disk.
+        """
+        with self.lock:
+            self.live.pop(session_id, None)
+
+    def delete(self, session_id: str):
+        self.evict(session_id)
+        try:
+            os.remove(self._file(session_id))
+        except FileNotFoundError:
+            pass
@@ -5,8 +5,56 @@ import json
 from sympy import sympify
 from duckduckgo_search import DDGS
 from jinja2 import Template
-from colorama import Fore, Style
 import re
+import threading
+from datetime import date
+from Search_r1 import HedgedSearch, normalize_result
+from Index_r1 import LocalIndex, KINDS
+from Weather_r1 import LocationResolver, WeatherClient
+from Rates_r1 import RateStore
+from Fetch_r1 import stream_pages, urls_from_results
+from Console_r1 import get_renderer
+
+########################################################################################################################
+
+# every retrieved search / news result is kept in a local BM25 index, see local_search
+# (opened on first use, so an unusable index directory only disables the index, not the tools)
+_local_index: Optional[LocalIndex] = None
+_local_index_error: Optional[str] = None
+_local_index_lock = threading.RLock()
+
+
+def get_local_index() -> Optional[LocalIndex]:
+    """
+    Returning the shared local index, or None if it could not be opened.
+    """
+    global _local_index, _local_index_error
+    with _local_index_lock:
+        if _local_index is None and _local_index_error is None:
+            try:
+                _local_index = LocalIndex(os.environ.get("LOCAL_INDEX_DIR", "~/.cache/agent_tools/local_index"))
+            except Exception as e:
+                _local_index_error = str(e)
+                print(f' -> local index unavailable: {e} --\n')
+        return _local_index
+
+
+def index_results(results: List[dict], backend: str, kind: str):
+    """
+    Feeding search results to the local index; an index failure never fails the search itself.
+    """
+    try:
+        index = get_local_index()
+        if index is not None:
+            index.add([normalize_result(r, backend) for r in results or []], kind=kind)
+    except Exception as e:
+        print(f' -> local index update failed: {e} --\n')
+
+# equivalent location names ("Abuja", "abuja ", "Abuja, Nigeria") share one weather cache entry
+weather_client = WeatherClient(LocationResolver(os.environ.get("LOCATIONS_FILE", "~/.cache/agent_tools/locations.json")))
+
+# daily exchange-rate tables are kept in a memory-mapped store for date-based and bulk conversions
+rate_store = RateStore(os.environ.get("RATE_STORE_DIR", "~/.cache/agent_tools/rates"))
 
 ########################################################################################################################
 
@@ -45,11 +93,39 @@ def currency_converter(
         return f"Error: Target currency '{target_curr}' not available in the exchange rates."
     
     conv = data["rates"][target_curr] * amount
+    if data.get("date") and data["rates"].get("USD"):
+        usd = data["rates"]["USD"]
+        try:
+            rate_store.add_rates({data["date"]: {code: rate / usd for code, rate in data["rates"].items()}})
+        except Exception as e:  # the conversion itself is fine, only storing the table failed
+            print(f' -> rate store update failed: {e} --\n')
     print('-> TOOL-CURRENCY_CONVERTER CALLED')
     return f'{amount:.2f} {source_curr} is equivalent to: {conv:.2f} {target_curr}'
 
 ########################################################################################################################
 
+def currency_converter_on_date(
+    amount: Annotated[float, "Amount in source currency"],
+    source_curr: Annotated[str, "Source currency code"] = "USD",
+    target_curr: Annotated[str, "Target currency code"] = "GBP",
+    on_date: Annotated[Optional[str], "Date of the exchange rate (YYYY-MM-DD), defaults to today"] = None
+) -> str:
+    """
+    Converts an amount from a source currency to a target currency using the exchange rate of a given date.
+    """
+    print(' -> currency_converter_on_date Tool Called --\n')
+    on_date = on_date or str(date.today())
+    try:
+        conv = rate_store.convert_one(float(amount), source_curr, target_curr, on_date)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return f"Error: Unable to get exchange rates for {on_date}: {str(e)}"
+    
+    if conv != conv:  # NaN
+        return f"Error: No exchange rate from '{source_curr}' to '{target_curr}' available for {on_date}."
+    return f'{float(amount):.2f} {source_curr} is equivalent to: {conv:.2f} {target_curr} (rate of {on_date})'
+
+########################################################################################################################
+
 def ddg_search(
     query: Annotated[str, "Search query for DuckDuckGo"],
     max_results: Annotated[Optional[int], "Maximum number of results to retrieve"] = 4,
@@ -65,6 +141,7 @@ def ddg_search(
     
     ddgs = DDGS(headers=headers, timeout=timeout)
     results = ddgs.text(keywords=query, max_results=int(max_results)) 
+    index_results(results, "ddg", "text")
     return json.dumps(results, indent=2)
 
 ########################################################################################################################
@@ -83,6 +160,7 @@ def get_news(
     
     ddgs = DDGS(headers=headers, timeout=60)
     results = ddgs.news(keywords=topic, max_results=int(max_results))
+    index_results(results, "ddg", "news")
     return json.dumps(results, indent=2)
 
 ########################################################################################################################
@@ -102,31 +180,41 @@ def get_weather(
     if not api_key:
         return "Missing API key. Please set WEATHER_API_KEY environment variable."
     
-    API_params = {
-        "key": api_key,
-        "q": location.strip(),
-        "aqi": "yes",
-        "alerts": "no",
-    }
     print('*')
     try:
-        response = requests.get("http://api.weatherapi.com/v1/current.json", params=API_params)
-        response.raise_for_status()
+        data = weather_client.current(location, api_key)
     except requests.exceptions.RequestException as e:
         return f"Error fetching weather data: {str(e)}"
-    
-    if response.status_code != 200:
-        return f"Error: Unable to fetch weather data for {location}. Status code: {response.status_code}"
-    
-    try:
-        str_response: str = json.dumps(response.json())
-        print('***')
     except ValueError:
         return "Error: Unable to parse weather data."
+    
+    str_response: str = json.dumps(data)
+    print('***')
     return str_response
 
 ########################################################################################################################
 
+def get_weather_bulk(
+    locations: Annotated[List[str], "List of location names for weather information"]
+) -> str:
+    """
+    Retrieves the current weather for many locations in one call and returns a JSON object keyed by location.
+    """
+    print(' -> get_weather_bulk Tool Called --\n')
+    
+    if isinstance(locations, str):
+        locations = [loc for loc in re.split(r"[;\n]", locations) if loc.strip()]
+    if not locations:
+        return "Locations cannot be empty. Please provide at least one valid location."
+    
+    api_key = os.environ.get("WEATHER_API_KEY")
+    if not api_key:
+        return "Missing API key. Please set WEATHER_API_KEY environment variable."
+    
+    return json.dumps(weather_client.current_many(list(locations), api_key))
+
+########################################################################################################################
+
 def tavily_search(
     query: Annotated[str, "Search query for Tavily API"],
     max_results: Annotated[Optional[int], "Maximum number of results to retrieve"] = 5,
@@ -158,6 +246,7 @@ def tavily_search(
         response.raise_for_status()
         
         results = response.json()
+        index_results(results.get("results", []), "tavily", "text")
         return json.dumps(results, indent=2)
     
     except requests.exceptions.RequestException as e:
@@ -165,6 +254,85 @@ def tavily_search(
 
 ########################################################################################################################
 
+_search_frontend: Optional[HedgedSearch] = None
+
+
+def get_search_frontend() -> HedgedSearch:
+    """
+    Returning the shared hedged search, backed by the local index when it is available.
+    """
+    global _search_frontend
+    with _local_index_lock:
+        if _search_frontend is None:
+            _search_frontend = HedgedSearch(index=get_local_index())
+        return _search_frontend
+
+def web_search(
+    query: Annotated[str, "Search query for the web or news"],
+    max_results: Annotated[Optional[int], "Maximum number of results to retrieve"] = 4,
+    kind: Annotated[Optional[str], "Type of search: 'text' for websites or 'news' for latest news"] = "text"
+) -> str:
+    """
+    Searches the web (or news) using DuckDuckGo with Tavily as a hedged fallback and returns deduplicated results.
+    """
+    print(' -> web_search Tool Called --\n')
+    if kind not in KINDS:
+        return f"Error: kind must be one of {', '.join(KINDS)}."
+    try:
+        results = get_search_frontend().search(query, max_results=int(max_results), kind=kind)
+    except RuntimeError as e:
+        return f"Error: {str(e)}"
+    return json.dumps(results, indent=2)
+
+########################################################################################################################
+
+def local_search(
+    query: Annotated[str, "Search query for previously retrieved web and news results"],
+    max_results: Annotated[Optional[int], "Maximum number of results to retrieve"] = 5,
+    kind: Annotated[Optional[str], "Restrict to 'text' or 'news' results"] = None,
+    max_age_hours: Annotated[Optional[float], "Only return results retrieved or published within this many hours"] = None
+) -> str:
+    """
+    Searches the local index of previously retrieved web and news results (no network access) and returns the best matches.
+    """
+    print(' -> local_search Tool Called --\n')
+    if kind and kind not in KINDS:
+        return f"Error: kind must be one of {', '.join(KINDS)}."
+    max_age = float(max_age_hours) * 3600 if max_age_hours else None
+    index = get_local_index()
+    if index is None:
+        return f"Error: local index unavailable ({_local_index_error})."
+    results = index.search(query, max_results=int(max_results), kind=kind or None, max_age=max_age)
+    return json.dumps(results, indent=2)
+
+########################################################################################################################
+
+def fetch_pages(
+    search_results: Annotated[str, "Search results (JSON from ddg_search / get_news / web_search) or a list of URLs"],
+    query: Annotated[Optional[str], "Question used to rank the extracted text chunks"] = "",
+    top_n: Annotated[Optional[int], "Number of top URLs to download"] = 3,
+    max_chunks: Annotated[Optional[int], "Maximum number of text chunks to return"] = 6,
+    deadline: Annotated[Optional[float], "Seconds to wait for pages before using what has arrived"] = 12.0
+) -> str:
+    """
+    Downloads the top search result pages concurrently and returns their main text as ranked, size-bounded chunks.
+    """
+    print(' -> fetch_pages Tool Called --\n')
+    urls = urls_from_results(search_results)[: int(top_n)]
+    if not urls:
+        return "Error: No URLs found in the search results."
+
+    chunks, errors = [], []
+    for page in stream_pages(urls, query=query or "", deadline=deadline):
+        if "error" in page:
+            errors.append({"url": page["url"], "error": page["error"]})
+        chunks.extend(page["chunks"])
+
+    chunks.sort(key=lambda c: c["score"], reverse=True)
+    return json.dumps({"chunks": chunks[: int(max_chunks)], "errors": errors}, indent=2)
+
+########################################################################################################################
+
 def get_tool_specifications(
     tools: Annotated[Dict[str, callable], "Dictionary of tool names and functions"],
     llm: Annotated[callable, "LLM function to generate tool specifications"]
@@ -222,28 +390,9 @@ def cprint(
 ):
     """
     Prints colored output based on the label followed by a colon.
+    Rendering is buffered and written by a background thread (see Console_r1).
     """
-    color_mapping = {
-        "Agent": Fore.BLUE+Style.BRIGHT,
-        "Thought": Fore.CYAN,
-        "Action": Fore.YELLOW,
-        "Pause": Fore.MAGENTA,
-        "Observation": Fore.GREEN,
-        "Answer": Fore.BLUE,
-    }
-    
-    lines = message.splitlines()
-    last_color = Style.RESET_ALL
-
-    for line in lines:
-        label_match = re.match(r"(\w+):", line)
-        if label_match:
-            label = label_match.group(1)
-            color = color_mapping.get(label, Style.RESET_ALL)
-            last_color = color
-            print(f"{color}{line}{Style.RESET_ALL}")
-        else:
-            print(f"{last_color}{line}{Style.RESET_ALL}")
+    get_renderer().render(message)
 
 ########################################################################################################################
 
@@ -0,0 +1,239 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+########################################################################################################################
+# Token accounting and budgets
+#
+# UsageMeter adds up prompt / completion tokens, LLM time and wall time per query and per session, and splits each
+# call's prompt tokens over the messages that produced them:
+#   system        the system prompt
+#   history       user / assistant turns (including the current query)
+#   observations  tool results (role "tool", or "Observation: ..." turns in the ReAct loop)
+#   completions   tokens generated by the model
+# Per-message shares are estimated from text length (~4 chars per token) and scaled to the reported prompt_tokens.
+# A TokenBudget on the query or the session makes check() raise BudgetExceeded, so the caller can stop early.
+
+CATEGORIES = ("system", "history", "observations", "completions")
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD = 4  # role / separator tokens per message
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, scope: str, limit: str, used: float, allowed: float):
+        self.scope = scope
+        self.limit = limit
+        self.used = used
+        self.allowed = allowed
+        super().__init__(f"{scope} budget reached: {limit} {used:g} >= {allowed:g}")
+
+
+class TokenBudget:
+    LIMITS = ("max_calls", "max_prompt_tokens", "max_completion_tokens", "max_total_tokens", "max_seconds")
+
+    def __init__(
+        self,
+        max_calls: Optional[int] = None,
+        max_prompt_tokens: Optional[int] = None,
+        max_completion_tokens: Optional[int] = None,
+        max_total_tokens: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+    ):
+        """
+        Limits for a query or a session; None means unlimited.
+        """
+        self.max_calls = max_calls
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_completion_tokens = max_completion_tokens
+        self.max_total_tokens = max_total_tokens
+        self.max_seconds = max_seconds
+
+    def exceeded(self, totals: Dict[str, float]) -> Optional[Tuple[str, float, float]]:
+        """
+        Returning (limit, used, allowed) for the first limit reached, None if within budget.
+        """
+        for limit in self.LIMITS:
+            allowed = getattr(self, limit)
+            used = totals["wall_seconds" if limit == "max_seconds" else limit[len("max_"):]]
+            if allowed is not None and used >= allowed:
+                return limit, used, allowed
+        return None
+
+
+def usage_counts(usage: Any) -> Optional[Tuple[int, int]]:
+    """
+    Returning (prompt_tokens, completion_tokens) from an OpenAI usage object or dict, None if missing.
+    """
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+    return usage.prompt_tokens or 0, usage.completion_tokens or 0
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def message_category(message: Dict[str, Any]) -> str:
+    role = message.get("role")
+    if role == "system":
+        return "system"
+    if role == "tool" or (role == "user" and str(message.get("content") or "").lstrip().startswith("Observation:")):
+        return "observations"
+    return "history"
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    tokens = MESSAGE_OVERHEAD + estimate_tokens(message.get("content"))
+    for tool_call in message.get("tool_calls") or ():
+        tokens += estimate_tokens(json.dumps(tool_call, default=str))
+    return tokens
+
+
+def new_totals() -> Dict[str, float]:
+    return {
+        "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+        "llm_seconds": 0.0, "wall_seconds": 0.0, "estimated_calls": 0,
+        **{f"{category}_tokens": 0 for category in CATEGORIES},
+    }
+
+
+def best_effort_answer(error: BudgetExceeded, observations: List[str], max_chars: int = 1500) -> str:
+    """
+    Building an answer from whatever was gathered before the budget ran out.
+    """
+    if not observations:
+        return f"Stopped early ({error}) before an answer could be generated."
+    gathered = "\n".join(str(observation)[:max_chars] for observation in observations)
+    return f"Stopped early ({error}). Results gathered so far:\n{gathered}"
+
+########################################################################################################################
+
+class UsageMeter:
+    def __init__(self, query_budget: Optional[TokenBudget] = None, session_budget: Optional[TokenBudget] = None):
+        """
+        Accounting tokens and time for one session and its current query, enforcing optional budgets.
+        """
+        self.query_budget = query_budget
+        self.session_budget = session_budget
+        self.session = new_totals()
+        self.query = new_totals()
+        self.queries = 0
+        self._query_started: Optional[float] = None
+
+    def start_query(self):
+        self.end_query()
+        self.query = new_totals()
+        self.queries += 1
+        self._query_started = time.perf_counter()
+
+    def end_query(self):
+        """
+        Closing the current query and adding its wall time to the session.
+        """
+        if self._query_started is not None:
+            self.query["wall_seconds"] = time.perf_counter() - self._query_started
+            self.session["wall_seconds"] += self.query["wall_seconds"]
+            self._query_started = None
+
+    def _live_wall_seconds(self) -> float:
+        return time.perf_counter() - self._query_started if self._query_started is not None else self.query["wall_seconds"]
+
+    def record(self, messages: List[Dict[str, Any]], usage: Any, seconds: float, completion: Optional[str] = None):
+        """
+        Adding one LLM call: messages sent, usage reported (None to estimate), LLM time and the completion text.
+        """
+        estimates = {category: 0 for category in CATEGORIES[:-1]}
+        for message in messages:
+            if not isinstance(message, dict):  # ChatCompletionMessage kept in the state as returned
+                message = message.model_dump(exclude_none=True)
+            estimates[message_category(message)] += message_tokens(message)
+        estimated_prompt = sum(estimates.values())
+
+        counts = usage_counts(usage)
+        if counts is None:
+            prompt_tokens, completion_tokens = estimated_prompt, estimate_tokens(completion)
+        else:
+            prompt_tokens, completion_tokens = counts
+        scale = prompt_tokens / estimated_prompt if estimated_prompt else 0.0
+
+        for totals in (self.query, self.session):
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["total_tokens"] += prompt_tokens + completion_tokens
+            totals["llm_seconds"] += seconds
+            totals["estimated_calls"] += int(counts is None)
+            for category, tokens in estimates.items():
+                totals[f"{category}_tokens"] += round(tokens * scale)
+            totals["completions_tokens"] += completion_tokens
+
+    def check(self):
+        """
+        Raising BudgetExceeded if the query or session budget is used up.
+        """
+        wall = self._live_wall_seconds()
+        checks = (
+            ("query", self.query_budget, {**self.query, "wall_seconds": wall}),
+            ("session", self.session_budget, {**self.session, "wall_seconds": self.session["wall_seconds"] + wall}),
+        )
+        for scope, budget, totals in checks:
+            hit = budget.exceeded(totals) if budget else None
+            if hit:
+                raise BudgetExceeded(scope, *hit)
+
+    @staticmethod
+    def _with_attribution(totals: Dict[str, float]) -> Dict[str, Any]:
+        parts = {category: totals[f"{category}_tokens"] for category in CATEGORIES}
+        counted = sum(parts.values())
+        return {
+            **{key: value for key, value in totals.items() if key[: -len("_tokens")] not in CATEGORIES},
+            "attribution": {
+                category: {"tokens": tokens, "share": round(tokens / counted, 3) if counted else 0.0}
+                for category, tokens in parts.items()
+            },
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returning query and session totals with tokens attributed to system prompt, history, observations and completions.
+        """
+        query = {**self.query, "wall_seconds": self._live_wall_seconds()}
+        session = {**self.session, "wall_seconds": self.session["wall_seconds"] + (
+            query["wall_seconds"] if self._query_started is not None else 0.0)}
+        return {
+            "queries": self.queries,
+            "query": self._with_attribution(query),
+            "session": self._with_attribution(session),
+        }
+
+
+class UsageLedger:
+    def __init__(
+        self,
+        query_budget: Optional[TokenBudget] = None,
+        session_budget: Optional[TokenBudget] = None,
+        max_sessions: int = 10000,
+    ):
+        """
+        Keeping one UsageMeter per session id (least recently used dropped first), e.g. for the HTTP server.
+        """
+        self.query_budget = query_budget
+        self.session_budget = session_budget
+        self.max_sessions = max_sessions
+        self.meters: "OrderedDict[str, UsageMeter]" = OrderedDict()
+        self.lock = threading.Lock()  # meter() is called from the server's worker threads
+
+    def meter(self, session_id: str) -> UsageMeter:
+        with self.lock:
+            meter = self.meters.get(session_id)
+            if meter is None:
+                meter = self.meters[session_id] = UsageMeter(self.query_budget, self.session_budget)
+                while len(self.meters) > self.max_sessions:
+                    self.meters.popitem(last=False)
+            else:
+                self.meters.move_to_end(session_id)
+            return meter
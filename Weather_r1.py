@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+WEATHER_URL = "http://api.weatherapi.com/v1/current.json"
+BULK_NOT_ON_PLAN = 2009  # weatherapi error code: the API key's plan has no access to bulk requests
+
+# Common alternative spellings / names mapped to one normalized name
+LOCATION_ALIASES = {
+    "fct": "abuja",
+    "federal capital territory": "abuja",
+    "abuja fct": "abuja",
+    "lagos state": "lagos",
+    "eko": "lagos",
+    "nyc": "new york",
+    "new york city": "new york",
+    "joburg": "johannesburg",
+    "jozi": "johannesburg",
+    "kinshasa drc": "kinshasa",
+}
+
+########################################################################################################################
+
+class LocationResolver:
+    def __init__(self, path: str, aliases: Optional[Dict[str, str]] = None):
+        """
+        Mapping free-form location names to a canonical cache key; resolutions learnt from weatherapi are persisted.
+        """
+        self.path = os.path.expanduser(path)
+        self.aliases = aliases if aliases is not None else LOCATION_ALIASES
+        self.lock = threading.Lock()
+        self.resolved: Dict[str, str] = {}  # normalized name -> canonical key
+        self.queries: Dict[str, str] = {}  # canonical key -> "lat,lon" query
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            self.resolved, self.queries = dict(saved.get("resolved", {})), dict(saved.get("queries", {}))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            # an unreadable table only costs the learnt resolutions; it is rewritten on the next learn()
+            print(f' -> ignoring unreadable location file {self.path}: {e} --\n')
+
+    def normalize(self, location: str) -> str:
+        """
+        Lower-casing, collapsing whitespace / punctuation and applying the alias table.
+        """
+        name = re.sub(r"\s+", " ", re.sub(r"[^\w\s,'-]", " ", location.lower())).strip(" ,")
+        name = re.sub(r"\s*,\s*", ", ", name)
+        parts = name.split(", ")
+        parts[0] = self.aliases.get(parts[0], parts[0])
+        return self.aliases.get(name, ", ".join(parts))
+
+    def key(self, location: str) -> str:
+        """
+        Returning the canonical key for a location ("Abuja", "abuja " and "Abuja, Nigeria" share one once resolved).
+        """
+        name = self.normalize(location)
+        with self.lock:
+            if name in self.resolved:
+                return self.resolved[name]
+            # "abuja, nigeria" reuses the resolution of "abuja" when the qualifiers agree with it
+            head, *qualifiers = name.split(", ")
+            candidate = self.resolved.get(head)
+            if candidate and set(qualifiers) <= set(candidate.split(", ")[1:]):
+                return candidate
+            return name
+
+    def query(self, key: str) -> str:
+        """
+        Returning what to send to weatherapi for a canonical key (coordinates once known).
+        """
+        return self.queries.get(key, key)
+
+    def learn(self, location: str, api_location: Dict[str, Any]):
+        """
+        Recording the location weatherapi resolved a name to, and persisting the table.
+        """
+        canonical = ", ".join(
+            part.lower() for part in (api_location.get("name"), api_location.get("region"), api_location.get("country")) if part
+        )
+        if not canonical:
+            return
+        name = self.normalize(location)
+        with self.lock:
+            self.resolved[name] = canonical
+            self.resolved.setdefault(canonical, canonical)
+            head = name.split(", ")[0]
+            if head != name and head == canonical.split(", ")[0]:
+                self.resolved.setdefault(head, canonical)  # "abuja, nigeria" also teaches "abuja"
+            if "lat" in api_location and "lon" in api_location:
+                self.queries[canonical] = f"{api_location['lat']},{api_location['lon']}"
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"resolved": self.resolved, "queries": self.queries}, f)
+        os.replace(tmp_path, self.path)
+
+########################################################################################################################
+
+class WeatherClient:
+    def __init__(self, resolver: LocationResolver, ttl: float = 600.0, max_workers: int = 8):
+        """
+        Fetching current weather with a short TTL cache keyed by canonical location, singly or in bulk.
+        """
+        self.resolver = resolver
+        self.ttl = ttl
+        self.cache: Dict[str, tuple] = {}  # canonical key -> (fetched_at, response json)
+        self.session = requests.Session()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather")
+        self.bulk_available = True  # switched off after the first "no access" answer (bulk needs a paid plan)
+
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.cache.get(key)
+        if entry and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def _store(self, location: str, data: Dict[str, Any]) -> str:
+        self.resolver.learn(location, data.get("location", {}))
+        key = self.resolver.key(location)
+        self.cache[key] = (time.time(), data)
+        return key
+
+    def current(self, location: str, api_key: str) -> Dict[str, Any]:
+        """
+        Returning the weatherapi current.json response for one location (raises requests exceptions).
+        """
+        key = self.resolver.key(location)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        params = {"key": api_key, "q": self.resolver.query(key), "aqi": "yes", "alerts": "no"}
+        response = self.session.get(WEATHER_URL, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        self._store(location, data)
+        return data
+
+    def _bulk(self, locations: List[str], api_key: str) -> Dict[str, Dict[str, Any]]:
+        body = {"locations": [{"q": self.resolver.query(self.resolver.key(loc)), "custom_id": str(i)} for i, loc in enumerate(locations)]}
+        params = {"key": api_key, "q": "bulk", "aqi": "yes", "alerts": "no"}
+        response = self.session.post(WEATHER_URL, params=params, json=body, timeout=20)
+        if response.status_code in (400, 401, 403):
+            try:
+                code = response.json().get("error", {}).get("code")
+            except (ValueError, AttributeError):
+                code = None
+            if code == BULK_NOT_ON_PLAN:  # other errors (bad key, bad query, ...) may not repeat, keep trying bulk
+                self.bulk_available = False
+            raise requests.exceptions.HTTPError(f"Bulk request failed: {response.text[:200]}")
+        response.raise_for_status()
+
+        results = {}
+        for item in response.json().get("bulk", []):
+            query = item.get("query", {})
+            location = locations[int(query.get("custom_id", -1))]
+            if "error" in query:
+                results[location] = {"error": query["error"].get("message", "unknown error")}
+            else:
+                data = {"location": query.get("location", {}), "current": query.get("current", {})}
+                self._store(location, data)
+                results[location] = data
+        return results
+
+    def current_many(self, locations: List[str], api_key: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Returning {location: response or {"error": ...}}, one upstream request per distinct canonical location.
+        Uses weatherapi's bulk mode when available, otherwise concurrent single requests.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, List[str]] = {}  # canonical key -> requested names
+        for location in locations:
+            key = self.resolver.key(location)
+            cached = self._cached(key)
+            if cached is not None:
+                results[location] = cached
+            else:
+                pending.setdefault(key, []).append(location)
+
+        to_fetch = [names[0] for names in pending.values()]
+        fetched: Dict[str, Dict[str, Any]] = {}
+        if len(to_fetch) > 1 and self.bulk_available:
+            try:
+                fetched = self._bulk(to_fetch, api_key)
+            except (requests.exceptions.RequestException, ValueError):
+                fetched = {}
+        remaining = [loc for loc in to_fetch if loc not in fetched]
+        for location, future in [(loc, self.executor.submit(self.current, loc, api_key)) for loc in remaining]:
+            try:
+                fetched[location] = future.result()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                fetched[location] = {"error": str(e)}
+
+        for names in pending.values():
+            for name in names:
+                results[name] = fetched.get(names[0], {"error": "no result"})
+        return {location: results[location] for location in locations}
@@ -0,0 +1,77 @@
+"""
+Benchmark for the local BM25 index (Index_r1.LocalIndex): indexing throughput, reopen time, query latency, disk size.
+
+    python bench_local_index.py --docs 100000
+    python bench_local_index.py --docs 1000000 --batch 1000
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from Index_r1 import LocalIndex
+
+########################################################################################################################
+
+def synthetic_results(rng, vocab, n_docs: int, start: int = 0):
+    # zipf-distributed words give realistic long-tail postings lists
+    ranks = np.minimum(rng.zipf(1.15, size=(n_docs, 48)), len(vocab)) - 1
+    for i, row in enumerate(ranks):
+        words = vocab[row]
+        yield {
+            "url": f"https://example.com/{start + i}",
+            "title": " ".join(words[:8]),
+            "body": " ".join(words[8:]),
+        }
+
+
+def percentile_ms(samples, q):
+    return 1000 * float(np.percentile(samples, q))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--vocab", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vocab = np.array([f"w{i}" for i in range(args.vocab)])
+    path = tempfile.mkdtemp(prefix="bench_local_index_")
+    try:
+        index = LocalIndex(path, flush_every=50_000)
+        start = time.perf_counter()
+        for offset in range(0, args.docs, args.batch):
+            batch = list(synthetic_results(rng, vocab, min(args.batch, args.docs - offset), offset))
+            index.add(batch, kind="news" if offset % 2 else "text")
+        index.flush()
+        index.compact()
+        build = time.perf_counter() - start
+        print(f"indexed {len(index):,} docs in {build:.1f} s ({len(index) / build:,.0f} docs/s)")
+        print(f"disk size: {index.stats()['disk_bytes'] / 2**20:.1f} MiB")
+
+        start = time.perf_counter()
+        index = LocalIndex(path)
+        print(f"reopen: {1000 * (time.perf_counter() - start):.1f} ms")
+
+        for label, kwargs in [("all", {}), ("news, 6h", {"kind": "news", "max_age": 6 * 3600})]:
+            latencies = []
+            for _ in range(args.queries):
+                query = " ".join(vocab[np.minimum(rng.zipf(1.3, size=3), len(vocab)) - 1])
+                start = time.perf_counter()
+                index.search(query, max_results=5, **kwargs)
+                latencies.append(time.perf_counter() - start)
+            print(
+                f"query ({label}): p50 {percentile_ms(latencies, 50):.2f} ms, "
+                f"p95 {percentile_ms(latencies, 95):.2f} ms, p99 {percentile_ms(latencies, 99):.2f} ms"
+            )
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Load test for the agent HTTP server (Server_r1) against a local stand-in LLM.
+
+The stand-in serves an OpenAI-compatible /v1/chat/completions endpoint with a fixed latency: the first call of a turn
+asks for get_weather, the second answers (streamed when requested). The tool itself is local, so the numbers show the
+server's own overhead, admission control and tail latency.
+
+    python bench_server_load.py --users 64 --duration 20 --max-concurrency 16 --max-queue 32
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import shutil
+import tempfile
+import time
+import uuid
+
+import httpx
+import numpy as np
+import tornado.web
+
+from Agent_r1 import Agent
+from Models_r1 import ChatClient
+from Server_r1 import AgentServer
+from Session_r1 import SessionStore
+from tool_schemas import tool_schema_get_weather
+
+ANSWER = "* Current Time: 16:52\n* Temperature: 30.7°C\n* Condition: Patchy rain nearby"
+
+########################################################################################################################
+
+class StandInLLM(tornado.web.RequestHandler):
+    def initialize(self, latency: float):
+        self.latency = latency
+
+    async def post(self):
+        body = json.loads(self.request.body)
+        await asyncio.sleep(self.latency)
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "created": int(time.time()), "model": body["model"]}
+        usage = {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120}
+
+        if body["messages"][-1]["role"] == "user":
+            message = {"role": "assistant", "content": None, "tool_calls": [{
+                "id": f"call_{uuid.uuid4().hex[:8]}", "type": "function",
+                "function": {"name": "get_weather", "arguments": json.dumps({"location": "Abuja"})},
+            }]}
+            finish_reason = "tool_calls"
+        else:
+            message = {"role": "assistant", "content": ANSWER}
+            finish_reason = "stop"
+
+        if not body.get("stream"):
+            self.set_header("Content-Type", "application/json")
+            return self.finish(json.dumps({
+                **base, "object": "chat.completion", "usage": usage,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            }))
+
+        self.set_header("Content-Type", "text/event-stream")
+        for word in ANSWER.split(" "):
+            chunk = {**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+            self.write(f"data: {json.dumps(chunk)}\n\n")
+            await self.flush()
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self.write(f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n")
+        self.write("data: [DONE]\n\n")
+        self.finish()
+
+
+def get_weather(location: str) -> str:
+    return json.dumps({"location": {"name": location}, "current": {"temp_c": 30.7}})
+
+########################################################################################################################
+
+async def user(client: httpx.AsyncClient, url: str, deadline: float, stream_share: float, results: list):
+    session_id = uuid.uuid4().hex
+    while time.perf_counter() < deadline:
+        stream = random.random() < stream_share
+        payload = {"message": "Weather in Abuja", "session_id": session_id, "stream": stream}
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, json=payload)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = -1
+        results.append((status, time.perf_counter() - start))
+        if status == 503:
+            await asyncio.sleep(float(response.headers.get("Retry-After", 1)) * random.random())
+
+
+def run_llm(port: int, latency: float):
+    async def serve():
+        tornado.web.Application([(r"/v1/chat/completions", StandInLLM, {"latency": latency})]).listen(port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def run_server(port: int, llm_port: int, sessions_dir: str, max_concurrency: int, max_queue: int):
+    import contextlib
+    import io
+
+    client = ChatClient(api_key="stand-in", base_url=f"http://127.0.0.1:{llm_port}/v1", model="stand-in")
+    client.bind_tools([tool_schema_get_weather])
+
+    def agent_factory(session_id, session_store):
+        return Agent("You are a helpful assistant.", client, {"get_weather": get_weather},
+                     session_store=session_store, session_id=session_id)
+
+    async def serve():
+        AgentServer(agent_factory, SessionStore(sessions_dir), max_concurrency, max_queue).listen(port)
+        await asyncio.Event().wait()
+
+    with contextlib.redirect_stdout(io.StringIO()):  # Agent.run prints every response
+        asyncio.run(serve())
+
+
+async def wait_ready(url: str, timeout: float = 20.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as http:
+        while True:
+            try:
+                await http.get(url)
+                return
+            except httpx.HTTPError:
+                if time.perf_counter() > deadline:
+                    raise
+                await asyncio.sleep(0.1)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--stream-share", type=float, default=0.3)
+    args = parser.parse_args()
+
+    # stand-in LLM, agent server and load generator each get their own process (and GIL)
+    llm_port, agent_port = 18081, 18080
+    sessions_dir = tempfile.mkdtemp(prefix="bench_server_")
+    processes = [
+        multiprocessing.Process(target=run_llm, args=(llm_port, args.llm_latency), daemon=True),
+        multiprocessing.Process(
+            target=run_server, args=(agent_port, llm_port, sessions_dir, args.max_concurrency, args.max_queue), daemon=True,
+        ),
+    ]
+    for process in processes:
+        process.start()
+
+    results = []
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    try:
+        await wait_ready(f"http://127.0.0.1:{agent_port}/healthz")
+        async with httpx.AsyncClient(timeout=60, limits=limits) as http:
+            start = time.perf_counter()
+            deadline = start + args.duration
+            url = f"http://127.0.0.1:{agent_port}/v1/chat"
+            await asyncio.gather(*(user(http, url, deadline, args.stream_share, results) for _ in range(args.users)))
+            elapsed = time.perf_counter() - start
+            metrics = (await http.get(f"http://127.0.0.1:{agent_port}/metrics")).json()
+    finally:
+        for process in processes:
+            process.terminate()
+        shutil.rmtree(sessions_dir, ignore_errors=True)
+
+    ok = np.array([latency for status, latency in results if status == 200])
+    shed = sum(1 for status, _ in results if status == 503)
+    failed = sum(1 for status, _ in results if status not in (200, 503))
+    print(f"{args.users} users, {args.duration:.0f} s, max_concurrency={args.max_concurrency}, max_queue={args.max_queue}, "
+          f"LLM latency {1000 * args.llm_latency:.0f} ms x 2 calls/request")
+    print(f"completed: {len(ok)} ({len(ok) / elapsed:.1f} req/s), shed: {shed}, failed: {failed}")
+    if len(ok):
+        print("latency ms: p50 {:.1f}, p95 {:.1f}, p99 {:.1f}, max {:.1f}".format(
+            *(1000 * np.percentile(ok, [50, 95, 99, 100]))))
+    print("server metrics:", json.dumps(metrics))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Benchmark for session state (Session_r1): memory per session for plain dict / ChatCompletionMessage state versus
+MessageRecord, and append / snapshot / resume times of SessionStore.
+
+    python bench_session_memory.py --sessions 2000 --turns 5
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from openai.types.chat import ChatCompletionMessage
+
+from Session_r1 import MessageRecord, SessionStore
+
+SYSTEM_PROMPT = "You are an intelligent 'Assistant' and you act as 'A general purpose assistant capable of answering user questions'"
+WEATHER_PAYLOAD = json.dumps({
+    "location": {"name": "Abuja", "region": "Federal Capital Territory", "country": "Nigeria", "lat": 9.07, "lon": 7.4,
+                 "tz_id": "Africa/Lagos", "localtime_epoch": 1729957934, "localtime": "2024-10-26 16:52"},
+    "current": {"last_updated": "2024-10-26 16:45", "temp_c": 30.7, "temp_f": 87.3, "is_day": 1,
+                "condition": {"text": "Patchy rain nearby", "icon": "//cdn.weatherapi.com/weather/64x64/day/176.png", "code": 1063},
+                "wind_mph": 5.1, "wind_kph": 8.3, "wind_degree": 236, "wind_dir": "SW", "pressure_mb": 1009.0,
+                "precip_mm": 0.02, "humidity": 58, "cloud": 62, "feelslike_c": 34.8, "uv": 3.5,
+                "air_quality": {"co": 623.25, "no2": 4.255, "o3": 92.0, "so2": 2.22, "pm2_5": 27.75, "pm10": 54.39}},
+    "forecast_hint": ["Patchy rain nearby"] * 20,
+})
+
+
+def turn(session: int, i: int):
+    call_id = f"call_{session}_{i}"
+    return [
+        {"role": "user", "content": f"Weather in Abuja, give bulleted response, with current time and date ({i})"},
+        ChatCompletionMessage(role="assistant", content=None, tool_calls=[
+            {"id": call_id, "type": "function", "function": {"name": "get_weather", "arguments": '{"location": "Abuja"}'}}
+        ]),
+        {"role": "tool", "content": WEATHER_PAYLOAD[:-1] + f', "turn": {i}}}', "tool_call_id": call_id},  # fresh string
+        ChatCompletionMessage(role="assistant", content="* Current Time: 16:52\n* Temperature: 30.7°C\n* Condition: Patchy rain nearby"),
+    ]
+
+
+def measure(build, sessions: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    states = [build(s) for s in range(sessions)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del states
+    return (after - before) / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args()
+
+    def plain(s):
+        return [{"role": "system", "content": f"{SYSTEM_PROMPT} (session {s})"}] + [m for i in range(args.turns) for m in turn(s, i)]
+
+    def compact(s):
+        return [MessageRecord.from_wire(m) for m in plain(s)]
+
+    plain_bytes = measure(plain, args.sessions)
+    compact_bytes = measure(compact, args.sessions)
+    print(f"memory per session ({args.turns} turns): plain {plain_bytes / 1024:.1f} KiB, "
+          f"MessageRecord {compact_bytes / 1024:.1f} KiB ({plain_bytes / compact_bytes:.1f}x smaller)")
+
+    path = tempfile.mkdtemp(prefix="bench_sessions_")
+    try:
+        store = SessionStore(path, max_live=args.sessions)
+        messages = plain(0)
+        start = time.perf_counter()
+        for s in range(args.sessions):
+            for message in messages:
+                store.append(f"s{s}", message)
+        elapsed = time.perf_counter() - start
+        print(f"append: {1e6 * elapsed / (args.sessions * len(messages)):.1f} us/message")
+
+        start = time.perf_counter()
+        for s in range(args.sessions):
+            store.snapshot(f"s{s}")
+        print(f"snapshot: {1e3 * (time.perf_counter() - start) / args.sessions:.3f} ms/session")
+
+        for s in range(args.sessions):
+            store.evict(f"s{s}")
+        start = time.perf_counter()
+        for s in range(args.sessions):
+            store.get(f"s{s}")
+        print(f"resume: {1e3 * (time.perf_counter() - start) / args.sessions:.3f} ms/session")
+        assert [m.to_wire() for m in store.get("s0")] == [MessageRecord.from_wire(m).to_wire() for m in messages]
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
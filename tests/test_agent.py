@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pytest
+
+from Agent_r1 import Agent
+from Session_r1 import SessionStore
+
+
+def tool_call(call_id, name, arguments):
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+
+
+class ScriptedClient:
+    """
+    Answering the first request with the given tool calls and every later one with plain text.
+    """
+
+    def __init__(self, tool_calls):
+        self.tool_calls = tool_calls
+        self.requests = []
+
+    def run(self, messages, route=None, meter=None):
+        self.requests.append(messages)
+        if len(self.requests) == 1:
+            return SimpleNamespace(
+                role="assistant", content=None, tool_calls=[
+                    SimpleNamespace(id=c["id"], type="function", function=SimpleNamespace(**c["function"]))
+                    for c in self.tool_calls
+                ],
+                model_dump=lambda **_: {"role": "assistant", "content": None, "tool_calls": self.tool_calls},
+            )
+        return SimpleNamespace(role="assistant", content="done", tool_calls=None)
+
+
+def failing_tool(city: str):
+    raise RuntimeError("service down")
+
+
+@pytest.mark.parametrize("call", [
+    tool_call("call_1", "failing_tool", '{"city": "Accra"}'),
+    tool_call("call_1", "unknown_tool", "{}"),
+    tool_call("call_1", "failing_tool", "{not json"),
+])
+def test_failed_tool_call_still_gets_a_reply(tmp_path, call):
+    store = SessionStore(str(tmp_path))
+    client = ScriptedClient([call])
+    agent = Agent("system", client, {"failing_tool": failing_tool}, session_store=store, session_id="s1")
+
+    assert agent.run("weather in Accra?") == "done"
+    roles = [record.role for record in SessionStore(str(tmp_path)).get("s1")]
+    assert roles == ["system", "user", "assistant", "tool", "assistant"]
+    reply = store.get("s1")[3].to_wire()
+    assert reply["tool_call_id"] == "call_1"
+    assert reply["content"].startswith(f"Failed to execute tool '{call['function']['name']}'")
@@ -0,0 +1,43 @@
+import pytest
+
+from Fetch_r1 import extract_text, urls_from_results
+
+BODY = "Body paragraph that is long enough to be kept as a block."
+
+
+def test_article_keeps_its_header_headline():
+    page = extract_text(
+        "<title>Site</title><nav><p>Navigation paragraph long enough to be kept as a block</p></nav>"
+        f"<article><header><h1>Headline</h1></header><p>{BODY}</p></article>"
+    )
+    assert page == {"title": "Site", "blocks": ["Headline", BODY]}
+
+
+def test_teaser_article_in_page_chrome_is_not_the_root():
+    page = extract_text(
+        "<aside><article><p>Teaser paragraph of another story, long enough to count</p></article></aside>"
+        f"<main><p>{BODY}</p></main>"
+    )
+    assert page["blocks"] == [BODY]
+
+
+def test_page_chrome_is_dropped_without_a_content_root():
+    page = extract_text(
+        f"<header><p>Header paragraph long enough to be kept as a block</p></header><p>{BODY}</p>"
+        "<footer><p>Footer paragraph long enough to be kept as a block</p></footer>"
+    )
+    assert page["blocks"] == [BODY]
+
+
+@pytest.mark.parametrize("search_results, urls", [
+    ('[{"href": "https://a.org"}, {"url": "https://b.org"}, {"href": "https://a.org"}]', ["https://a.org", "https://b.org"]),
+    ('{"results": [{"url": "https://b.org"}]}', ["https://b.org"]),
+    ("see https://a.org and https://b.org", ["https://a.org", "https://b.org"]),
+    ('"5"', []),
+    ("5", []),
+    ("null", []),
+    ('{"results": 5}', []),
+    ('[5, null, {"url": 7}, "https://a.org"]', ["https://a.org"]),
+])
+def test_urls_from_results(search_results, urls):
+    assert urls_from_results(search_results) == urls
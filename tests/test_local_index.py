@@ -0,0 +1,153 @@
+import os
+import shutil
+
+import pytest
+
+from Index_r1 import LocalIndex
+
+
+def result(i, body=None):
+    return {"url": f"https://example.com/{i}", "title": f"Story {i}", "body": body or f"rainfall report number{i} lagos"}
+
+
+@pytest.fixture
+def open_index(tmp_path):
+    opened = []
+
+    def make(**kwargs):
+        index = LocalIndex(str(tmp_path / "index"), **kwargs)
+        opened.append(index)
+        return index
+
+    yield make
+    for index in opened:
+        if not index.lock_file.closed:
+            index.close()
+
+
+def urls(results):
+    return [r["url"] for r in results]
+
+
+def test_add_search_document_round_trip(open_index):
+    index = open_index(flush_every=1000)
+    assert index.add([result(i) for i in range(5)]) == 5
+    hits = index.search("number3")
+    assert urls(hits) == ["https://example.com/3"]
+    assert hits[0]["title"] == "Story 3"
+    assert index.document(0)["url"] == "https://example.com/0"
+    assert len(index) == 5
+
+
+def test_reopen_after_flush(open_index):
+    index = open_index(flush_every=1000)
+    index.add([result(i) for i in range(20)])
+    index.flush()
+    before = index.search("lagos", max_results=20)
+    index.close()
+
+    reopened = open_index()
+    assert len(reopened) == 20
+    assert reopened.stats()["buffered"] == 0
+    assert reopened.search("lagos", max_results=20) == before
+
+
+def test_reopen_replays_unflushed_documents(open_index):
+    index = open_index(flush_every=1000)
+    index.add([result(i) for i in range(10)])
+    index.flush()
+    index.add([result(i) for i in range(10, 15)])  # logged, still in the buffer
+    index.docs_file.close()  # dropping the process without close(): nothing more is flushed
+    index.docs_file = None
+    index.lock_file.close()
+
+    reopened = open_index()
+    assert len(reopened) == 15
+    assert reopened.stats()["buffered"] == 5
+    assert urls(reopened.search("number12")) == ["https://example.com/12"]
+    assert reopened.document(14)["url"] == "https://example.com/14"
+
+
+def test_torn_log_line_is_ignored(open_index, tmp_path):
+    index = open_index(flush_every=1000)
+    index.add([result(i) for i in range(3)])
+    index.close()
+    with open(tmp_path / "index" / "docs.jsonl", "ab") as f:
+        f.write(b'{"id": 3, "url": "https://exa')
+
+    reopened = open_index()
+    assert len(reopened) == 3
+    reopened.add([result(3), result(4)])
+    reopened.close()
+
+    again = open_index()
+    assert len(again) == 5
+    assert again.document(4)["url"] == "https://example.com/4"
+
+
+def test_same_url_replaces_document(open_index):
+    index = open_index(flush_every=1000)
+    index.add([result(1, "old text about harmattan")])
+    index.flush()
+    index.add([result(1, "new text about monsoon")])
+    assert index.search("harmattan") == []
+    assert urls(index.search("monsoon")) == ["https://example.com/1"]
+    assert len(index) == 1
+    index.close()
+
+    reopened = open_index()
+    assert reopened.search("harmattan") == []
+    assert len(reopened) == 1
+
+
+def test_compaction_survives_reopen(open_index, tmp_path):
+    index = open_index(flush_every=10, max_segments=2)
+    for start in range(0, 40, 10):
+        index.add([result(i) for i in range(start, start + 10)])
+    index.add([result(5, "replaced body savanna")])
+    index.close()
+    assert len(index.segments) <= 2
+
+    reopened = open_index()
+    assert len(reopened) == 40
+    assert urls(reopened.search("number35")) == ["https://example.com/35"]
+    assert urls(reopened.search("savanna")) == ["https://example.com/5"]
+    assert reopened.search("number5") == []
+    assert not [name for name in os.listdir(tmp_path / "index") if name.endswith(".merging")]
+
+
+def test_interrupted_compaction_is_recovered(open_index, tmp_path):
+    path = tmp_path / "index"
+    index = open_index(flush_every=10, max_segments=100)
+    for start in range(0, 30, 10):
+        index.add([result(i) for i in range(start, start + 10)])
+    inputs = sorted(name for name in os.listdir(path) if name.startswith("seg_"))
+    saved = tmp_path / "saved"
+    for name in inputs:
+        shutil.copytree(path / name, saved / name)
+    shutil.copytree(path / inputs[0], path / "seg_0000000000-0000000030.merging")  # an unpublished merge
+    index.compact()
+    index.close()
+    for name in inputs:  # crash after publishing the merge, before its inputs were removed
+        shutil.copytree(saved / name, path / name)
+
+    reopened = open_index()
+    assert len(reopened.segments) == 1
+    assert len(reopened) == 30
+    assert len(reopened.search("lagos", max_results=50)) == 30
+    assert sorted(name for name in os.listdir(path) if name.startswith("seg_")) == ["seg_0000000000-0000000030"]
+
+
+def test_second_writer_opens_read_only(open_index):
+    writer = open_index(flush_every=1000)
+    writer.add([result(i) for i in range(5)])
+    writer.flush()
+
+    reader = open_index()
+    assert reader.read_only
+    assert reader.add([result(99)]) == 0
+    assert len(reader.search("lagos", max_results=10)) == 5
+    reader.close()
+    writer.close()
+
+    assert not open_index().read_only
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import openai
+import pytest
+
+from Models_r1 import ChatClient, ModelRoute
+
+
+class FailingCompletions:
+    def create(self, **params):
+        raise openai.APIConnectionError(request=None)
+
+
+def failing_client():
+    return SimpleNamespace(chat=SimpleNamespace(completions=FailingCompletions()), base_url="http://localhost")
+
+
+def test_failed_fallback_is_recorded():
+    client = ChatClient(api_key="test", routes={"summarization": ModelRoute("small", base_url="http://localhost:1")})
+    client.client = failing_client()
+    client._route_clients = {key: failing_client() for key in [("http://localhost:1", "test", 30.0)]}
+
+    with pytest.raises(openai.OpenAIError):
+        client.run("hello", route="summarization")
+    with pytest.raises(openai.OpenAIError):
+        list(client.run_stream("hello", route="summarization"))
+
+    report = client.route_report()
+    assert report["summarization"]["failures"] == 2
+    assert report["summarization:fallback"] == {**report["summarization:fallback"], "calls": 2, "failures": 2, "fallbacks": 2}
+
+
+def test_unknown_route_category_is_rejected():
+    with pytest.raises(ValueError, match="summarisation"):
+        ChatClient(api_key="test", routes={"summarisation": ModelRoute.ollama()})
@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+import pytest
+
+from Rates_r1 import RateStore
+
+
+@pytest.fixture
+def tables():
+    return {
+        "2024-01-02": {"EUR": 0.9, "NGN": 900.0},
+        "2024-01-03": {"EUR": 0.92, "NGN": 910.0},
+        "2024-01-05": {"EUR": 0.95, "NGN": 950.0, "KES": 160.0},
+    }
+
+
+def test_add_and_convert_round_trip(tmp_path, tables):
+    store = RateStore(str(tmp_path))
+    store.add_rates(tables)
+    assert store.convert_one(100, "USD", "EUR", "2024-01-02", fetch_missing=False) == pytest.approx(90.0)
+    assert store.convert_one(90, "EUR", "NGN", "2024-01-03", fetch_missing=False) == pytest.approx(90 * 910 / 0.92)
+    assert store.last_date == np.datetime64("2024-01-05")
+
+
+def test_reopen_keeps_rates_and_currencies(tmp_path, tables):
+    store = RateStore(str(tmp_path))
+    store.add_rates(tables)
+    expected = store.convert(["2024-01-02", "2024-01-05"], [1, 1], ["USD", "EUR"], ["NGN", "KES"])
+
+    reopened = RateStore(str(tmp_path))
+    assert reopened.currencies == store.currencies
+    assert reopened.last_date == np.datetime64("2024-01-05")
+    np.testing.assert_allclose(
+        reopened.convert(["2024-01-02", "2024-01-05"], [1, 1], ["USD", "EUR"], ["NGN", "KES"]), expected,
+    )
+
+
+def test_append_after_reopen(tmp_path, tables):
+    RateStore(str(tmp_path)).add_rates(tables)
+    reopened = RateStore(str(tmp_path))
+    reopened.add_rates({"2024-02-01": {"EUR": 0.91, "GHS": 12.0}})
+
+    again = RateStore(str(tmp_path))
+    assert again.last_date == np.datetime64("2024-02-01")
+    assert again.rates("2024-01-02", "EUR") == pytest.approx(0.9)
+    assert again.rates("2024-02-01", "GHS") == pytest.approx(12.0)
+
+
+def test_forward_fill_up_to_max_gap(tmp_path, tables):
+    store = RateStore(str(tmp_path), max_gap=7)
+    store.add_rates(tables)
+    assert store.rates("2024-01-04", "EUR") == pytest.approx(0.92)  # the previous day's rate
+    assert store.rates("2024-01-12", "EUR") == pytest.approx(0.95)
+    assert math.isnan(store.rates("2024-01-13", "EUR"))  # more than max_gap days after the last rate
+    assert math.isnan(store.rates("2024-01-02", "KES"))  # before the currency's first rate
+    assert math.isnan(store.rates("2024-01-02", "XYZ"))
+
+
+def test_rates_before_start_are_rejected(tmp_path):
+    store = RateStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.add_rates({"1998-12-31": {"EUR": 1.0}})
+    assert store.last_date is None
+
+
+def test_writers_sharing_a_store_keep_their_columns(tmp_path):
+    first = RateStore(str(tmp_path))
+    second = RateStore(str(tmp_path))  # e.g. the server and a notebook
+    first.add_rates({"2024-01-02": {"NGN": 900.0}})
+    second.add_rates({"2024-01-02": {"KES": 160.0}})
+
+    reopened = RateStore(str(tmp_path))
+    assert reopened.rates("2024-01-02", "NGN") == pytest.approx(900.0)
+    assert reopened.rates("2024-01-02", "KES") == pytest.approx(160.0)
+    assert second.rates("2024-01-02", "NGN") == pytest.approx(900.0)
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from Server_r1 import AgentServer, Overloaded
+from Session_r1 import SessionStore
+
+
+def test_session_waiters_count_against_the_queue(tmp_path):
+    server = AgentServer(lambda session_id, store: None, SessionStore(str(tmp_path)), max_queue=2, queue_timeout=5.0)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def request():
+            async with server.session_slot("hot"):
+                await release.wait()
+
+        requests = [asyncio.ensure_future(request()) for _ in range(3)]  # one runs, two wait for it
+        await asyncio.sleep(0)
+        assert server.admission.queued == 2
+        with pytest.raises(Overloaded):
+            async with server.session_slot("hot"):
+                pass
+        async with server.session_slot("other"):  # other sessions are not waiting, so not shed
+            pass
+        release.set()
+        await asyncio.wait_for(asyncio.gather(*requests), timeout=5)
+        assert server.admission.queued == 0
+        assert server.session_requests == {}
+
+    asyncio.run(scenario())
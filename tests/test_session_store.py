@@ -0,0 +1,100 @@
+import os
+
+from Session_r1 import COMPRESS_ABOVE, MessageRecord, SessionStore
+
+TOOL_CALL = {"id": "call_1", "type": "function", "function": {"name": "get_weather", "arguments": '{"location": "Accra"}'}}
+
+
+def conversation():
+    return [
+        {"role": "system", "content": "you are a helpful assistant."},
+        {"role": "user", "content": "weather in Accra?"},
+        {"role": "assistant", "content": None, "tool_calls": [TOOL_CALL]},
+        {"role": "tool", "content": "x" * (COMPRESS_ABOVE * 4), "tool_call_id": "call_1"},
+        {"role": "assistant", "content": "It is sunny."},
+    ]
+
+
+def test_message_record_round_trip():
+    for message in conversation():
+        record = MessageRecord.from_wire(message)
+        assert MessageRecord.from_wire(record.to_wire()) == record
+    assert MessageRecord.from_wire(conversation()[3]).text == "x" * (COMPRESS_ABOVE * 4)
+
+
+def test_append_evict_resume(tmp_path):
+    store = SessionStore(str(tmp_path))
+    for message in conversation():
+        store.append("s1", message)
+    live = [record.to_wire() for record in store.get("s1")]
+
+    store.evict("s1")
+    assert "s1" not in store.live
+    assert [record.to_wire() for record in store.get("s1")] == live
+
+    reopened = SessionStore(str(tmp_path))
+    assert reopened.exists("s1")
+    assert [record.to_wire() for record in reopened.get("s1")] == live
+    assert reopened.get("s1")[2].to_wire()["tool_calls"][0]["function"]["arguments"] == TOOL_CALL["function"]["arguments"]
+
+
+def test_lru_keeps_max_live(tmp_path):
+    store = SessionStore(str(tmp_path), max_live=2)
+    for session_id in ("a", "b", "c"):
+        store.append(session_id, {"role": "user", "content": session_id})
+    assert list(store.live) == ["b", "c"]
+    assert store.get("a")[0].text == "a"
+
+
+def test_snapshot_rewrites_log(tmp_path):
+    store = SessionStore(str(tmp_path))
+    for message in conversation():
+        store.append("s1", message)
+    del store.get("s1")[1:]
+    store.snapshot("s1")
+
+    reopened = SessionStore(str(tmp_path))
+    assert [record.role for record in reopened.get("s1")] == ["system"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    store = SessionStore(str(tmp_path))
+    store.append("s1", {"role": "user", "content": "hello"})
+    with open(store._file("s1"), "ab") as f:
+        f.write(b'{"m": {"role": "assist')
+
+    messages = SessionStore(str(tmp_path)).get("s1")
+    assert [record.text for record in messages] == ["hello"]
+
+
+def test_distinct_ids_use_distinct_logs(tmp_path):
+    store = SessionStore(str(tmp_path))
+    long_id = "u" * 1000
+    for session_id in ("user.1", "user_1", "../user/1", long_id):
+        store.append(session_id, {"role": "user", "content": session_id})
+
+    reopened = SessionStore(str(tmp_path))
+    for session_id in ("user.1", "user_1", "../user/1", long_id):
+        assert [record.text for record in reopened.get(session_id)] == [session_id]
+    assert len(os.listdir(tmp_path)) == 4
+
+
+def test_delete(tmp_path):
+    store = SessionStore(str(tmp_path))
+    store.append("s1", {"role": "user", "content": "hello"})
+    store.delete("s1")
+    assert not store.exists("s1")
+    assert SessionStore(str(tmp_path)).get("s1") == []
+
+
+def test_appends_after_a_torn_line_survive(tmp_path):
+    store = SessionStore(str(tmp_path))
+    store.append("s1", {"role": "user", "content": "hello"})
+    with open(store._file("s1"), "ab") as f:
+        f.write(b'{"m": {"role": "assist')
+
+    resumed = SessionStore(str(tmp_path))
+    resumed.append("s1", {"role": "assistant", "content": "hi"})
+    resumed.append("s1", {"role": "user", "content": "weather?"})
+    assert [record.text for record in SessionStore(str(tmp_path)).get("s1")] == ["hello", "hi", "weather?"]
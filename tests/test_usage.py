@@ -0,0 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from Usage_r1 import UsageLedger
+
+
+def test_ledger_is_safe_across_threads():
+    ledger = UsageLedger(max_sessions=8)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        meters = list(executor.map(lambda i: ledger.meter(f"s{i % 32}"), range(20_000)))
+    assert len(ledger.meters) == 8
+    assert all(meter is not None for meter in meters)
+
+
+def test_ledger_keeps_recent_sessions():
+    ledger = UsageLedger(max_sessions=2)
+    first = ledger.meter("a")
+    ledger.meter("b")
+    assert ledger.meter("a") is first
+    ledger.meter("c")
+    assert list(ledger.meters) == ["a", "c"]
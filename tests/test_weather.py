@@ -0,0 +1,54 @@
+import pytest
+import requests
+
+from Weather_r1 import BULK_NOT_ON_PLAN, LocationResolver, WeatherClient
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(str(self.status_code))
+
+
+class FakeSession:
+    def __init__(self, bulk_response):
+        self.bulk_response = bulk_response
+
+    def post(self, url, params=None, json=None, timeout=None):
+        return self.bulk_response
+
+    def get(self, url, params=None, timeout=None):
+        return FakeResponse(200, {"location": {"name": params["q"].title()}, "current": {"temp_c": 30.0}})
+
+
+@pytest.mark.parametrize("contents", ["{not json", "[1, 2]", ""])
+def test_unreadable_location_file_is_treated_as_empty(tmp_path, contents):
+    path = tmp_path / "locations.json"
+    path.write_text(contents)
+    resolver = LocationResolver(str(path))
+    assert resolver.resolved == {} and resolver.queries == {}
+
+    resolver.learn("Abuja", {"name": "Abuja", "country": "Nigeria", "lat": 9.07, "lon": 7.4})
+    assert LocationResolver(str(path)).key("abuja") == resolver.key("abuja")
+
+
+@pytest.mark.parametrize("status, code, bulk_available", [
+    (400, BULK_NOT_ON_PLAN, False),
+    (400, 1006, True),  # no location found
+    (401, 2006, True),  # invalid API key
+])
+def test_only_no_access_disables_bulk(tmp_path, status, code, bulk_available):
+    client = WeatherClient(LocationResolver(str(tmp_path / "locations.json")))
+    client.session = FakeSession(FakeResponse(status, {"error": {"code": code, "message": "error"}}))
+
+    results = client.current_many(["Accra", "Lagos"], "key")
+    assert client.bulk_available is bulk_available
+    assert results["Accra"]["current"]["temp_c"] == 30.0  # answered by single requests
@@ -61,6 +61,55 @@ tool_schema_get_weather = {
     }
 }
 
+tool_schema_get_weather_bulk = {
+    "type": "function",
+    "function": {
+        "name": "get_weather_bulk",
+        "description": "Get the current weather for several locations in one call, e.g. to compare cities. Returns results keyed by location.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "locations": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "The location names for weather information."
+                }
+            },
+            "required": ["locations"]
+        }
+    }
+}
+
+tool_schema_currency_converter_on_date = {
+    "type": "function",
+    "function": {
+        "name": "currency_converter_on_date",
+        "description": "Convert an amount between currencies using the exchange rate of a given (historical) date.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "amount": {
+                    "type": "number",
+                    "description": "The amount in the source currency."
+                },
+                "source_curr": {
+                    "type": "string",
+                    "description": "The source currency code (e.g., 'USD')."
+                },
+                "target_curr": {
+                    "type": "string",
+                    "description": "The target currency code (e.g., 'EUR')."
+                },
+                "on_date": {
+                    "type": "string",
+                    "description": "The date of the exchange rate in YYYY-MM-DD format. Defaults to today."
+                }
+            },
+            "required": ["amount", "source_curr", "target_curr"]
+        }
+    }
+}
+
 tool_schema_calculate = {
     "type": "function",
     "function": {
@@ -79,6 +128,94 @@ tool_schema_calculate = {
     }
 }
 
+tool_schema_web_search = {
+    "type": "function",
+    "function": {
+        "name": "web_search",
+        "description": "Search the web or the latest news for a query, with automatic fallback between search backends, and return deduplicated results.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "The query to search for."
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "The maximum number of results to return."
+                },
+                "kind": {
+                    "type": "string",
+                    "enum": ["text", "news"],
+                    "description": "'text' for websites / URLs, 'news' for the latest news."
+                }
+            },
+            "required": ["query"]
+        }
+    }
+}
+
+tool_schema_fetch_pages = {
+    "type": "function",
+    "function": {
+        "name": "fetch_pages",
+        "description": "Download the top pages from a search result and return their main text as ranked chunks, for answering questions the search snippets cannot.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "search_results": {
+                    "type": "string",
+                    "description": "The search results (JSON) returned by a search tool, or URLs separated by spaces."
+                },
+                "query": {
+                    "type": "string",
+                    "description": "The question used to rank the extracted text."
+                },
+                "top_n": {
+                    "type": "integer",
+                    "description": "The number of top URLs to download."
+                },
+                "max_chunks": {
+                    "type": "integer",
+                    "description": "The maximum number of text chunks to return."
+                }
+            },
+            "required": ["search_results"]
+        }
+    }
+}
+
+tool_schema_local_search = {
+    "type": "function",
+    "function": {
+        "name": "local_search",
+        "description": "Search previously retrieved web and news results stored locally. Fast and offline; use before searching the web again.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "The query to search for."
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "The maximum number of results to return."
+                },
+                "kind": {
+                    "type": "string",
+                    "enum": ["text", "news"],
+                    "description": "Restrict to websites ('text') or news ('news')."
+                },
+                "max_age_hours": {
+                    "type": "number",
+                    "description": "Only return results from the last this many hours."
+                }
+            },
+            "required": ["query"]
+        }
+    }
+}
+
 # Combine into a list
 tools_spec = [
     tool_schema_get_news,
@@ -95,49 +232,29 @@ tools_spec = [
     tool_schema_calculate
 ]
 
-#generationn of schema
-##########################################################################################################################
-from Tools_r3 import calculate, currency_converter, get_news, ddg_search, get_weather
-from Tools_r3 import get_tool_specifications
-import os
-import openai
-from groq import Groq
-from pprint import pprint
-##########################################################################################################################
-
-client = openai.OpenAI(
-    base_url="https://api.groq.com/openai/v1",
-    api_key=os.environ.get("GROQ_API_KEY"),
-)
+#generationn of schema (run this file directly; importing it only provides the schemas above)
+if __name__ == "__main__":
+    ##########################################################################################################################
+    from Tools_r3 import calculate, currency_converter, get_news, ddg_search, get_weather
+    from Tools_r3 import get_tool_specifications
+    from Models_r1 import ChatClient, ModelRoute
+    import os
+    from pprint import pprint
+    ##########################################################################################################################
 
-def call_llm(message, client=client):
-
-    if not isinstance(message, list): # in case formatted message is not given
-        messages=[
-            # Set an optional system message. This sets the behavior of the
-            {"role": "system", "content": "you are a helpful assistant."},
-            # Set a user message for the assistant to respond to.
-            {"role": "user", "content": message}
-            ]
-    else:
-        messages=message
-    
-    chat_completion = client.chat.completions.create(
-        messages=messages,            
+    # schema drafting goes to a small local model first, falling back to the big Groq model if it fails
+    client = ChatClient(
         model="llama-3.2-90b-text-preview",
-        #model='llama3-70b-8192',
-        temperature=0,
-        max_tokens=128,
-        stream=False,
+        routes={"schema_drafting": ModelRoute.ollama(os.environ.get("OLLAMA_MODEL", "llama3.2:3b"))},
     )
+    call_llm = client.as_llm("schema_drafting")
+    ##########################################################################################################################
+    os.system("clear")
 
-    return chat_completion.choices[0].message.content
-##########################################################################################################################
-os.system("clear")
-
-tools = {'get_news': get_news, 'get_weather': get_weather, "calculate": calculate}
-spec = get_tool_specifications(tools, call_llm)
-pprint(spec, width=160)
+    tools = {'get_news': get_news, 'get_weather': get_weather, "calculate": calculate}
+    spec = get_tool_specifications(tools, call_llm)
+    pprint(spec, width=160)
+    pprint(client.route_report(), width=160)
 
 
 #tools_spec = [{'type': 'function', 'name': 'get_news', 'description': 'Search the web for the latest news based on a query and return the results.', 'parameters': {'type': 'object', 'properties': {'topic': {'type': 'string', 'description': 'The query to search for news.'}, 'max_results': {'type': 'integer', 'description': 'The maximum number of news results to return.'}}, 'required': ['topic']}}, {'type': 'function', 'name': 'get_weather', 'description': 'Get the current weather for a specified location. This includes temperature, humidity, AQI, rain, snow, current time and data etc.', 'parameters': {'type': 'object', 'properties': {'location': {'type': 'string', 'description': 'The location name for weather information.'}}, 'required': ['location']}}, {'type': 'function', 'function': {'name': 'calculate', 'description': 'Evaluates a mathematical expression using sympy and returns the result as a float.', 'parameters': {'type': 'object', 'properties': {'expression': {'type': 'string', 'description': 'A string representing a mathematical expression.'}}, 'required': ['expression']}}}]